@@ -28,4 +28,4 @@ export DJANGO_API_CACHE_ENABLED=false
 # Generate mock server files
 echo "Generating mock server files"
 compose run normandy ./bin/wait-for-it.sh database:5432
-compose run testgen /mock-server/generate.py /build $MOCK_SERVER_DOMAIN
+compose run testgen /mock-server/generate.py /build $MOCK_SERVER_DOMAIN "${@:3}"
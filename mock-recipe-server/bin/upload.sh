@@ -9,4 +9,4 @@ fi
 BUILD_DIR=$1
 S3_BUCKET=$2
 
-aws s3 sync --delete "$BUILD_DIR" "s3://$S3_BUCKET/" --grants read=uri=http://acs.amazonaws.com/groups/global/AllUsers
+aws s3 sync --delete --exclude ".fingerprints.json" "$BUILD_DIR" "s3://$S3_BUCKET/" --grants read=uri=http://acs.amazonaws.com/groups/global/AllUsers
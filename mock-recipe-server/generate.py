@@ -4,13 +4,15 @@ Script for generating static HTML files suitable for hosting on a static
 host (like AWS S3) that mock out the Normandy recipe server API for
 particular test cases.
 """
+import argparse
+import hashlib
 import os
 import sys
 from pathlib import Path
 
 import configurations
 
-from utils import APIPath
+from utils import APIPath, build_incrementally
 
 
 # Add normandy to the import path and setup Django stuff.
@@ -23,21 +25,60 @@ configurations.setup()
 # Now that Django is set up we can import Django things.
 from django.template import Context, Template  # noqa
 
+import normandy  # noqa
+from normandy.base.utils import canonical_json_dumps  # noqa
+from normandy.recipes.models import Action  # noqa
 from testcases import get_testcases  # noqa
 
 
+def get_code_hash():
+    """
+    Hash the code that every testcase's output depends on: the recipe
+    server, the mock server utilities and the actions in the database.
+    """
+    code_hash = hashlib.sha256()
+    normandy_path = Path(normandy.__file__).parent
+    source_paths = sorted(normandy_path.rglob('*.py')) + [Path(__file__).parent / 'utils.py']
+    for source_path in source_paths:
+        code_hash.update(str(source_path).encode())
+        code_hash.update(source_path.read_bytes())
+
+    actions = Action.objects.order_by('name').values_list(
+        'name', 'implementation_hash', 'arguments_schema_json')
+    code_hash.update(canonical_json_dumps(list(actions)).encode())
+    return code_hash.hexdigest()
+
+
 def main():
     """
     Load each defined testcase from testcases.py and save the state of
-    the API after each testcase is loaded.
+    the API after each testcase is loaded. Testcases whose fingerprint
+    matches the previous build in the same directory are skipped.
     """
-    build_path = Path(sys.argv[1])
-    domain = sys.argv[2]
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('build_path', type=Path)
+    parser.add_argument('domain', help='Protocol and domain to use for absolute URLs')
+    parser.add_argument('--force', action='store_true',
+                        help='Generate every testcase, even if it has not changed')
+    args = parser.parse_args()
+
+    code_hash = get_code_hash()
     testcases = get_testcases()
-    for testcase in testcases:
+    testcases_by_name = {testcase.name: testcase for testcase in testcases}
+    fingerprints = {
+        testcase.name: testcase.fingerprint(code_hash, args.domain) for testcase in testcases
+    }
+
+    def generate(name, testcase_path):
+        print(f'Generating {name}')
+        testcase = testcases_by_name[name]
         testcase.load()
-        testcase_api_path = APIPath(build_path / testcase.name, 'https://proxy:8443')
-        testcase.serialize_api(testcase_api_path, domain)
+        testcase_api_path = APIPath(testcase_path, 'https://proxy:8443')
+        testcase.serialize_api(testcase_api_path, args.domain)
+
+    build_path = args.build_path
+    generated = build_incrementally(build_path, fingerprints, generate, force=args.force)
+    print(f'Generated {len(generated)} of {len(testcases)} testcases')
 
     # Write the root index page.
     index_template_path = Path(__file__).parent / 'api_index.html'
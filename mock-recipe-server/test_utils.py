@@ -0,0 +1,86 @@
+"""
+Tests for the mock-server build utilities.
+"""
+import json
+from pathlib import Path
+
+from utils import FINGERPRINTS_FILENAME, build_incrementally, fingerprint, read_fingerprints
+
+
+def test_fingerprint_is_stable():
+    assert fingerprint({'a': 1, 'b': [1, 2]}) == fingerprint({'b': [1, 2], 'a': 1})
+
+
+def test_fingerprint_changes_with_data():
+    assert fingerprint({'source': 'v1'}) != fingerprint({'source': 'v2'})
+    assert fingerprint({'inputs': None}) != fingerprint({'inputs': []})
+
+
+class TestBuildIncrementally(object):
+    def generator(self):
+        calls = []
+
+        def generate(name, path):
+            calls.append(name)
+            path.mkdir()
+            (path / 'index.html').write_text(name)
+
+        return generate, calls
+
+    def test_it_generates_everything_at_first(self, tmpdir):
+        build_path = Path(str(tmpdir), 'build')
+        generate, calls = self.generator()
+        generated = build_incrementally(build_path, {'A': 'a1', 'B': 'b1'}, generate)
+
+        assert generated == calls == ['A', 'B']
+        assert read_fingerprints(build_path) == {'A': 'a1', 'B': 'b1'}
+
+    def test_it_skips_unchanged_outputs(self, tmpdir):
+        build_path = Path(str(tmpdir))
+        build_incrementally(build_path, {'A': 'a1', 'B': 'b1'}, self.generator()[0])
+
+        generate, calls = self.generator()
+        generated = build_incrementally(build_path, {'A': 'a1', 'B': 'b2'}, generate)
+        assert generated == calls == ['B']
+        assert (build_path / 'A' / 'index.html').read_text() == 'A'
+        assert read_fingerprints(build_path) == {'A': 'a1', 'B': 'b2'}
+
+    def test_it_regenerates_missing_directories(self, tmpdir):
+        build_path = Path(str(tmpdir))
+        build_incrementally(build_path, {'A': 'a1'}, self.generator()[0])
+        (build_path / 'A' / 'index.html').unlink()
+        (build_path / 'A').rmdir()
+
+        generate, calls = self.generator()
+        build_incrementally(build_path, {'A': 'a1'}, generate)
+        assert calls == ['A']
+
+    def test_force_regenerates_everything(self, tmpdir):
+        build_path = Path(str(tmpdir))
+        build_incrementally(build_path, {'A': 'a1', 'B': 'b1'}, self.generator()[0])
+
+        generate, calls = self.generator()
+        build_incrementally(build_path, {'A': 'a1', 'B': 'b1'}, generate, force=True)
+        assert calls == ['A', 'B']
+
+    def test_it_removes_stale_outputs(self, tmpdir):
+        build_path = Path(str(tmpdir))
+        build_incrementally(build_path, {'A': 'a1', 'B': 'b1'}, self.generator()[0])
+        (build_path / 'index.html').write_text('root index')
+
+        build_incrementally(build_path, {'A': 'a1'}, self.generator()[0])
+        assert (build_path / 'A').is_dir()
+        assert not (build_path / 'B').exists()
+        assert (build_path / 'index.html').exists()
+        assert read_fingerprints(build_path) == {'A': 'a1'}
+
+    def test_it_ignores_unreadable_fingerprints(self, tmpdir):
+        build_path = Path(str(tmpdir))
+        build_incrementally(build_path, {'A': 'a1'}, self.generator()[0])
+        (build_path / FINGERPRINTS_FILENAME).write_text('{invalid')
+
+        generate, calls = self.generator()
+        build_incrementally(build_path, {'A': 'a1'}, generate)
+        assert calls == ['A']
+        with (build_path / FINGERPRINTS_FILENAME).open() as f:
+            assert json.load(f) == {'A': 'a1'}
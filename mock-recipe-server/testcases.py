@@ -1,13 +1,19 @@
+import inspect
 import json
 import random
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from urllib.parse import urlparse, urlunparse
 
+from django.db import connection
+
 from product_details import product_details
 
 from normandy.base.utils import canonical_json_dumps
-from normandy.recipes.api.v1.serializers import ClientSerializer
 from normandy.recipes.models import Action, Recipe
 from normandy.recipes.tests import ClientFactory, RecipeFactory, SignatureFactory
+from utils import fingerprint
 
 
 def console_log(message, **kwargs):
@@ -46,6 +52,24 @@ def generate_long_message():
     return ' '.join([random.choice(phrases) for _ in range(1000)])
 
 
+def run_concurrently(*calls):
+    """
+    Call each of the given functions in its own thread and wait for them
+    all to finish, re-raising the first error any of them raised.
+    """
+    def run(call):
+        try:
+            return call()
+        finally:
+            # Each thread gets its own database connection, which would
+            # otherwise stay open until the generator exits.
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=max(len(calls), 1)) as executor:
+        futures = [executor.submit(run, call) for call in calls]
+        return [future.result() for future in futures]
+
+
 def get_testcases():
     """Return all defined testcases."""
     return sorted(
@@ -85,11 +109,53 @@ class TestCase(object):
 
     def client(self):
         """
-        Return a Client object that the client classification endpoint
-        should render for this test.
+        Return a Client object with the country that the client
+        classification endpoint should report for this test.
         """
         return ClientFactory()
 
+    def get_inputs(self):
+        """
+        Return JSON-serializable data, besides the code of this test
+        case, that the test case's data depends on. Override if
+        load_data uses data that can change between builds.
+        """
+        return None
+
+    def get_source(self):
+        """
+        Return the source code of this test case, its base classes and
+        the helper functions in this module.
+        """
+        module = sys.modules[__name__]
+        helpers = [
+            value for name, value in sorted(vars(module).items())
+            if inspect.isfunction(value) and value.__module__ == __name__
+        ]
+        classes = [cls for cls in type(self).__mro__ if issubclass(cls, TestCase)]
+        return ''.join(inspect.getsource(obj) for obj in helpers + classes)
+
+    def fingerprint(self, code_hash, domain):
+        """
+        Return a hash of everything that the serialized API for this test
+        case depends on. If it matches the fingerprint from the previous
+        build, the test case does not need to be generated again.
+
+        :param code_hash:
+            Hash of the code shared by all test cases, such as the
+            recipe server itself.
+        :param domain:
+            Protocol and domain used for absolute URLs in the serialized
+            API.
+        """
+        return fingerprint({
+            'code_hash': code_hash,
+            'domain': domain,
+            'inputs': self.get_inputs(),
+            'name': self.name,
+            'source': self.get_source(),
+        })
+
     def serialize_api(self, api_path, domain):
         """
         Fetch API responses from the service and save them to the
@@ -103,10 +169,12 @@ class TestCase(object):
             API.
         """
         root_path = api_path.add('api', 'v1')
-        self.serialize_api_root(root_path, domain)
-        self.serialize_recipe_api(root_path)
-        self.serialize_client_api(root_path)
-        self.serialize_action_api(root_path, domain)
+        run_concurrently(
+            partial(self.serialize_api_root, root_path, domain),
+            partial(self.serialize_recipe_api, root_path),
+            partial(self.serialize_client_api, root_path),
+            partial(self.serialize_action_api, root_path, domain),
+        )
 
     def serialize_api_root(self, root_path, domain):
         root_data = json.loads(root_path.fetch())
@@ -119,10 +187,12 @@ class TestCase(object):
         root_path.add('recipe', 'signed').save()
 
     def serialize_client_api(self, root_path):
-        client = self.client()
-        client_data = ClientSerializer(client).data
-        client_json = canonical_json_dumps(client_data)
-        root_path.add('classify_client').save(client_json)
+        # The server geolocates the machine generating the files, so the
+        # country is replaced with the one this test case wants.
+        client_path = root_path.add('classify_client')
+        client_data = json.loads(client_path.fetch())
+        client_data['country'] = self.client().country
+        client_path.save(canonical_json_dumps(client_data))
 
     def serialize_action_api(self, root_path, domain):
         # Action index
@@ -134,19 +204,24 @@ class TestCase(object):
         index_path.save(canonical_json_dumps(index_data))
 
         # Individual actions
-        for action in Action.objects.all():
-            # Action
-            action_path = root_path.add('action', action.name)
-            action_data = json.loads(action_path.fetch())
+        run_concurrently(*[
+            partial(self.serialize_action, root_path, action, domain)
+            for action in Action.objects.all()
+        ])
 
-            new_url = self.update_url(action_data['implementation_url'], domain)
-            action_data['implementation_url'] = new_url
+    def serialize_action(self, root_path, action, domain):
+        # Action
+        action_path = root_path.add('action', action.name)
+        action_data = json.loads(action_path.fetch())
 
-            action_json = canonical_json_dumps(action_data)
-            action_path.save(action_json)
+        new_url = self.update_url(action_data['implementation_url'], domain)
+        action_data['implementation_url'] = new_url
 
-            # Action implementation
-            action_path.add('implementation', action.implementation_hash).save()
+        action_json = canonical_json_dumps(action_data)
+        action_path.save(action_json)
+
+        # Action implementation
+        action_path.add('implementation', action.implementation_hash).save()
 
     def update_url(self, url, domain):
         """
@@ -176,6 +251,9 @@ class FilterVersion(TestCase):
             product_details.firefox_versions['LATEST_FIREFOX_VERSION'],
         ]
 
+    def get_inputs(self):
+        return self.versions
+
     def description(self):
         version_html = ', '.join(f'<code>{version}</code>' for version in self.versions)
         return f'''
@@ -391,6 +469,9 @@ class FilterLocales(TestCase):
     Several recipes that match the locales that Firefox is available in.
     All log to the console with the locale they matched.
     """
+    def get_inputs(self):
+        return sorted(product_details.languages.keys())
+
     def load_data(self):
         for locale in product_details.languages.keys():
             console_log(
@@ -1,7 +1,17 @@
+import hashlib
+import json
+import shutil
 from pathlib import Path
-from urllib.parse import urljoin
+from urllib.parse import urljoin, urlparse
 
-import requests
+
+#: Name of the file in the build directory that stores the fingerprint of
+#: each testcase from the previous build.
+FINGERPRINTS_FILENAME = '.fingerprints.json'
+
+
+class APIFetchError(Exception):
+    """Raised when the server returns an error response for an APIPath."""
 
 
 class APIPath(object):
@@ -31,10 +41,25 @@ class APIPath(object):
         return APIPath(self.base_path, self.base_url, self.segments + list(paths))
 
     def fetch(self):
-        """Fetch the response text for the current URL."""
-        response = requests.get(self.url, verify=False)
-        response.raise_for_status()
-        return response.text
+        """
+        Render the response text for the current URL in-process using
+        Django's test client, as if it had been requested from the host
+        in `base_url`.
+        """
+        # The mock server's own tests run without Django configured, so
+        # the test client is only imported when it is needed.
+        from django.test import Client
+
+        parsed_url = urlparse(self.url)
+        response = Client().get(
+            parsed_url.path,
+            secure=parsed_url.scheme == 'https',
+            HTTP_HOST=parsed_url.netloc,
+        )
+        if response.status_code >= 400:
+            raise APIFetchError(
+                f'Fetching {self.url} failed with status {response.status_code}')
+        return response.content.decode(response.charset)
 
     def read(self):
         """Read data on the filesystem for the current URL."""
@@ -53,3 +78,59 @@ class APIPath(object):
         self.path.mkdir(parents=True, exist_ok=True)
         with self.index_path.open(mode='w') as f:
             f.write(data)
+
+
+def fingerprint(data):
+    """Return a hash of JSON-serializable data."""
+    data_json = json.dumps(data, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(data_json.encode()).hexdigest()
+
+
+def read_fingerprints(build_path):
+    """Read the fingerprints saved by the previous build in `build_path`."""
+    try:
+        with (build_path / FINGERPRINTS_FILENAME).open() as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def build_incrementally(build_path, fingerprints, generate, force=False):
+    """
+    Generate the output for each name in `fingerprints` in a directory of
+    the same name under `build_path`, skipping names whose fingerprint and
+    directory are unchanged since the previous build. Directories for
+    names from the previous build that are no longer given are removed.
+
+    :param fingerprints:
+        Dict of fingerprints of the outputs to build, keyed by name.
+    :param generate:
+        Function called with the name and an empty directory Path for
+        each output that needs to be generated.
+    :param force:
+        If true, every output is generated even if it hasn't changed.
+    :returns:
+        List of the names that were generated.
+    """
+    build_path.mkdir(parents=True, exist_ok=True)
+    previous_fingerprints = read_fingerprints(build_path)
+
+    generated = []
+    for name, current_fingerprint in fingerprints.items():
+        output_path = build_path / name
+        unchanged = previous_fingerprints.get(name) == current_fingerprint
+        if unchanged and output_path.is_dir() and not force:
+            continue
+
+        if output_path.exists():
+            shutil.rmtree(str(output_path))
+        generate(name, output_path)
+        generated.append(name)
+
+    for name in previous_fingerprints.keys() - fingerprints.keys():
+        shutil.rmtree(str(build_path / name), ignore_errors=True)
+
+    with (build_path / FINGERPRINTS_FILENAME).open(mode='w') as f:
+        json.dump(fingerprints, f, indent=2, sort_keys=True)
+
+    return generated
@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+"""
+Compare the time taken to serve views marked with short_circuit_middlewares
+with and without ShortCircuitMiddleware.
+
+Usage: bin/benchmark_short_circuit.py [path ...] [--requests N]
+"""
+import argparse
+import os
+import sys
+import time
+
+import configurations
+
+
+# Setup Django stuff.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "normandy.settings")
+configurations.setup()
+
+from django.conf import settings  # noqa
+from django.test import Client  # noqa
+from django.test.utils import override_settings  # noqa
+
+
+SHORT_CIRCUIT_MIDDLEWARE = 'normandy.base.middleware.ShortCircuitMiddleware'
+
+
+def time_requests(path, count, middleware):
+    with override_settings(MIDDLEWARE=middleware, ALLOWED_HOSTS=['testserver']):
+        client = Client()
+        # The first request loads the middleware
+        assert client.get(path).status_code == 200
+
+        start = time.perf_counter()
+        for i in range(count):
+            client.get(path)
+        return (time.perf_counter() - start) / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('paths', nargs='*', default=['/__lbheartbeat__'])
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    full_middleware = list(settings.MIDDLEWARE)
+    if SHORT_CIRCUIT_MIDDLEWARE not in full_middleware:
+        sys.exit(f'{SHORT_CIRCUIT_MIDDLEWARE} is not in settings.MIDDLEWARE')
+    without_short_circuit = [m for m in full_middleware if m != SHORT_CIRCUIT_MIDDLEWARE]
+
+    for path in args.paths:
+        before = time_requests(path, args.requests, without_short_circuit)
+        after = time_requests(path, args.requests, full_middleware)
+        print(f'{path}: {before * 1e6:.0f}µs per request without short circuiting, '
+              f'{after * 1e6:.0f}µs with ({(1 - after / before) * 100:.0f}% less)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,177 @@
+import gzip
+import threading
+from collections import OrderedDict
+
+from django.utils.cache import patch_vary_headers
+
+from rest_framework.response import Response
+
+
+def get_compressors():
+    """
+    Return an ordered dict of functions that compress bytes, keyed by
+    their content coding, with the most preferred coding first.
+    """
+    # Content is compressed on the first request that needs it, so a
+    # moderate level is used to keep that request fast. Higher levels
+    # barely shrink JSON further.
+    compressors = OrderedDict()
+    compressors['gzip'] = lambda content: gzip.compress(content, compresslevel=6)
+    return compressors
+
+
+def parse_accept_encoding(header):
+    """
+    Parse an Accept-Encoding header into a dict of quality values keyed by
+    content coding.
+    """
+    qualities = {}
+    for item in header.split(','):
+        coding, _, params = item.partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding] = quality
+    return qualities
+
+
+def get_accepted_codings(accept_encoding):
+    """
+    Return the list of supported content codings allowed by the given
+    Accept-Encoding header.
+    """
+    qualities = parse_accept_encoding(accept_encoding)
+    return [
+        coding for coding in get_compressors()
+        if qualities.get(coding, qualities.get('*', 0.0)) > 0
+    ]
+
+
+class CompressedContent(object):
+    """
+    Content along with copies of it compressed with each supported content
+    coding. Copies that aren't smaller than the content are discarded.
+
+    If `encodings` is given, it is used as the compressed copies instead of
+    compressing the content again.
+    """
+
+    def __init__(self, content, encodings=None):
+        self.content = content
+        if encodings is not None:
+            self.encodings = OrderedDict(encodings)
+            return
+
+        self.encodings = OrderedDict()
+        for coding, compress in get_compressors().items():
+            compressed = compress(content)
+            if len(compressed) < len(content):
+                self.encodings[coding] = compressed
+
+    def encode(self, accept_encoding):
+        """
+        Return a tuple of the content coding the client prefers out of the
+        given Accept-Encoding header and the content compressed with it.
+        The coding is None if the content should be sent uncompressed.
+        """
+        qualities = parse_accept_encoding(accept_encoding)
+        best_coding, best_quality = None, 0.0
+        for coding in self.encodings:
+            quality = qualities.get(coding, qualities.get('*', 0.0))
+            if quality > best_quality:
+                best_coding, best_quality = coding, quality
+
+        if best_coding is None:
+            return None, self.content
+        return best_coding, self.encodings[best_coding]
+
+
+class CompressedContentCache(object):
+    """
+    A size-bounded, per-process cache of compressed content. Only content
+    that never changes for a given key, such as content addressed by its
+    hash, should be cached. The least recently used entries are evicted
+    first.
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, build):
+        """
+        Return the compressed content for `key`, calling `build` to
+        produce its content as bytes if it isn't cached.
+        """
+        with self._lock:
+            compressed = self._entries.get(key)
+            if compressed is not None:
+                self._entries.move_to_end(key)
+                return compressed
+
+        compressed = CompressedContent(build())
+        with self._lock:
+            self._entries[key] = compressed
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+        return compressed
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def encode_response(response, compressed):
+    """
+    Return the body of `response` for the given compressed content, using
+    the best content coding the response's request accepts, and set the
+    headers that go with it. The response's ETag is given a suffix for the
+    coding, since strong ETags must differ between encodings.
+    """
+    request = response.renderer_context['request']
+    coding, content = compressed.encode(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    if coding is not None:
+        response['Content-Encoding'] = coding
+        etag = response.get('ETag')
+        if etag and etag.endswith('"'):
+            response['ETag'] = f'{etag[:-1]}-{coding}"'
+    patch_vary_headers(response, ['Accept-Encoding'])
+    return content
+
+
+class CompressedResponse(Response):
+    """
+    A response that serves compressed content as-is, using the best
+    content coding the request accepts.
+    """
+
+    def __init__(self, compressed, **kwargs):
+        self.compressed = compressed
+        super().__init__(None, **kwargs)
+
+    @property
+    def rendered_content(self):
+        renderer = self.accepted_renderer
+        charset = renderer.charset
+        if self.content_type is not None:
+            self['Content-Type'] = self.content_type
+        elif charset:
+            self['Content-Type'] = f'{renderer.media_type}; charset={charset}'
+        else:
+            self['Content-Type'] = renderer.media_type
+
+        return encode_response(self, self.compressed)
@@ -1,4 +1,6 @@
-from normandy.base.decorators import api_cache_control
+from normandy.base.api.renderers import CanonicalJSONRenderer
+from normandy.base.api.snapshots import SnapshotResponse
+from normandy.base.decorators import api_cache_control, api_etag
 
 
 class CachingViewsetMixin(object):
@@ -11,3 +13,46 @@ class CachingViewsetMixin(object):
     @api_cache_control()
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
+
+
+class SnapshotListMixin(object):
+    """
+    Serve a viewset's list from the `SnapshotStore` in `list_snapshots`,
+    with an ETag. Viewsets implement `get_list_version`, which must change
+    whenever the list would, without serializing it. Requests that
+    `can_snapshot_list` rejects are served normally instead.
+
+    List it after `CachingViewsetMixin` in the bases, so that the list is
+    given the usual cache headers.
+    """
+    list_snapshots = None
+
+    def get_list_version(self, request):
+        raise NotImplementedError()
+
+    def get_list_etag(self, request):
+        if getattr(self, '_list_etag', None) is None:
+            self._list_etag = self.get_list_version(request)
+        return self._list_etag
+
+    def can_snapshot_list(self, request):
+        return True
+
+    def list(self, request, *args, **kwargs):
+        if not self.can_snapshot_list(request):
+            return super().list(request, *args, **kwargs)
+        return self.snapshot_list(request, *args, **kwargs)
+
+    @api_etag(get_list_etag)
+    def snapshot_list(self, request, *args, **kwargs):
+        def build():
+            queryset = self.filter_queryset(self.get_queryset())
+            page = self.paginate_queryset(queryset)
+            if page is None:
+                data = self.get_serializer(queryset, many=True).data
+            else:
+                data = self.get_paginated_response(self.get_serializer(page, many=True).data).data
+            return CanonicalJSONRenderer().render(data)
+
+        snapshot = self.list_snapshots.get(self.get_list_etag(request), build)
+        return SnapshotResponse(snapshot)
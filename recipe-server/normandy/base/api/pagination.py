@@ -0,0 +1,39 @@
+from rest_framework import pagination
+
+
+class CursorPagination(pagination.CursorPagination):
+    """
+    Keyset pagination with opaque cursors. Pages are found by seeking an
+    index on the ordering instead of counting rows from the start, so
+    pages deep into a list are as fast as the first.
+
+    Lists are only paginated if the request asks for a page size with the
+    ``page_size`` query parameter, so that clients that expect every
+    object keep getting them. Views may set ``cursor_ordering`` to a
+    stable, indexed ordering to page through.
+
+    DRF only stores the first ordering field in the cursor, and only seeks
+    on that field. Later fields, such as ``id`` after ``created``, just
+    make the order stable. Rows that tie on the first field are skipped
+    with an ``OFFSET`` of the number of ties already seen. That is only
+    cheap while ties are rare, as they are for creation timestamps. For
+    fields with many duplicates, use a unique first field, as the recipe
+    list does with ``('-id',)``.
+    """
+    ordering = ('-created', '-id')
+    page_size = None
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+    def get_page_size(self, request):
+        try:
+            return pagination._positive_int(
+                request.query_params[self.page_size_query_param],
+                strict=True,
+                cutoff=self.max_page_size,
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def get_ordering(self, request, queryset, view):
+        return getattr(view, 'cursor_ordering', self.ordering)
@@ -34,7 +34,8 @@ class MixedViewRouter(SimpleRouter):
         super().register(prefix, viewset, base_name=base_name)
 
     def register_view(self, prefix, View, *, name, allow_cdn=True, **kwargs):
-        url_pattern = url(r'^{}/$'.format(prefix), View.as_view(), name=name, **kwargs)
+        view = View.as_view() if hasattr(View, 'as_view') else View
+        url_pattern = url(r'^{}/$'.format(prefix), view, name=name, **kwargs)
         url_pattern.allow_cdn = allow_cdn
         self.registered_view_urls.append(url_pattern)
 
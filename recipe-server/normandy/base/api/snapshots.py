@@ -0,0 +1,122 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+
+from rest_framework.response import Response
+
+from normandy.base.api.compression import CompressedContent, encode_response
+from normandy.base.api.renderers import CanonicalJSONRenderer
+
+
+class Snapshot(object):
+    """
+    The rendered body of an API response for a single version of the data
+    behind it, along with compressed copies of it.
+    """
+
+    def __init__(self, content, encodings=None):
+        self.content = content
+        self.content_hash = hashlib.sha256(content).hexdigest()
+        self.compressed = CompressedContent(content, encodings)
+
+
+class SnapshotStore(object):
+    """
+    Keeps snapshots of pre-rendered API payloads, keyed by a version.
+
+    A version must change whenever the rendered content would change, so
+    snapshots never need to be invalidated. Recently used snapshots are
+    held in memory, and all snapshots are shared with other processes via
+    the Django cache, so each version is only rendered and compressed
+    once.
+
+    If `shared` is false, snapshots are only held in memory. This suits
+    versions that clients can vary freely, such as ones that include
+    query parameters, since they can't fill the Django cache.
+    """
+
+    def __init__(self, name, max_entries=None, shared=True):
+        self.name = name
+        self.max_entries = max_entries or settings.API_SNAPSHOT_MAX_ENTRIES
+        self.shared = shared
+        self._snapshots = OrderedDict()
+        self._lock = threading.Lock()
+
+    def cache_key(self, version):
+        return f'snapshot:compressed:{self.name}:{version}'
+
+    def get(self, version, build):
+        """
+        Return the snapshot for `version`, calling `build` to render its
+        content as bytes if no process has done so yet.
+        """
+        with self._lock:
+            snapshot = self._snapshots.get(version)
+            if snapshot is not None:
+                self._snapshots.move_to_end(version)
+                return snapshot
+
+        if self.shared:
+            snapshot = self._get_shared(version, build)
+        else:
+            snapshot = Snapshot(build())
+
+        with self._lock:
+            self._snapshots[version] = snapshot
+            while len(self._snapshots) > self.max_entries:
+                self._snapshots.popitem(last=False)
+
+        return snapshot
+
+    def _get_shared(self, version, build):
+        cache_key = self.cache_key(version)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return Snapshot(cached['content'], cached['encodings'])
+
+        snapshot = Snapshot(build())
+        cache.set(cache_key, {
+            'content': snapshot.content,
+            'encodings': list(snapshot.compressed.encodings.items()),
+        }, settings.API_SNAPSHOT_CACHE_TIME)
+        return snapshot
+
+    def clear(self):
+        with self._lock:
+            self._snapshots.clear()
+
+
+class SnapshotResponse(Response):
+    """
+    A response that serves a snapshot's content as-is when JSON is
+    requested, compressed with the best content coding the request
+    accepts. Other renderers, such as the browsable API, are given the
+    parsed data instead.
+    """
+
+    def __init__(self, snapshot, **kwargs):
+        self.snapshot = snapshot
+        self._data = None
+        super().__init__(None, **kwargs)
+
+    @property
+    def data(self):
+        if self._data is None:
+            self._data = json.loads(self.snapshot.content.decode())
+        return self._data
+
+    @data.setter
+    def data(self, value):
+        self._data = value
+
+    @property
+    def rendered_content(self):
+        renderer = getattr(self, 'accepted_renderer', None)
+        if isinstance(renderer, CanonicalJSONRenderer):
+            self['Content-Type'] = renderer.media_type
+            return encode_response(self, self.snapshot.compressed)
+        return super().rendered_content
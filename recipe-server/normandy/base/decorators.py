@@ -1,8 +1,12 @@
 from functools import wraps
 
 from django.conf import settings
+from django.http import HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
 from django.views.decorators.cache import cache_control
 
+from normandy.base.api.compression import get_accepted_codings
+
 
 def short_circuit_middlewares(view_func):
     """
@@ -37,3 +41,68 @@ def api_cache_control(**kwargs):
 
     directives.update(kwargs)
     return cache_control(**directives)
+
+
+def api_etag(etag_func):
+    """
+    Adds a strong ETag to the responses of an API view method, and returns
+    ``304 Not Modified`` if the request's ``If-None-Match`` header already
+    contains it.
+
+    `etag_func` is called with the view and the request before the view
+    method runs, and must return a string that changes whenever the
+    response body would. The view method is not called for 304 responses,
+    so `etag_func` should avoid serializing anything.
+
+    Responses may be compressed, in which case the ETag is given a suffix
+    for the content coding. ``If-None-Match`` headers containing one of
+    those ETags are only matched if the request accepts that coding.
+    """
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapped_view(self, request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view_method(self, request, *args, **kwargs)
+
+            etag = etag_func(self, request)
+            # Different renderers produce different bodies for the same data.
+            renderer = getattr(request, 'accepted_renderer', None)
+            if renderer is not None and renderer.format:
+                etag = '{}-{}'.format(etag, renderer.format)
+
+            if_none_match = request.META.get('HTTP_IF_NONE_MATCH', '')
+            accept_encoding = request.META.get('HTTP_ACCEPT_ENCODING', '')
+            candidates = [etag] + [
+                '{}-{}'.format(etag, coding) for coding in get_accepted_codings(accept_encoding)
+            ]
+            for candidate in candidates:
+                if etag_matches(if_none_match, '"{}"'.format(candidate)):
+                    response = HttpResponseNotModified()
+                    response['ETag'] = '"{}"'.format(candidate)
+                    patch_vary_headers(response, ['Accept-Encoding'])
+                    return response
+
+            response = view_method(self, request, *args, **kwargs)
+            if response.status_code == 200:
+                response['ETag'] = '"{}"'.format(etag)
+            return response
+        return wrapped_view
+    return decorator
+
+
+def etag_matches(if_none_match, etag):
+    """
+    Check if an ``If-None-Match`` header value matches an ETag, using weak
+    comparison as required for ``If-None-Match``.
+    """
+    if if_none_match.strip() == '*':
+        return True
+
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+
+    return False
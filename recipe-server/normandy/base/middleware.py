@@ -1,9 +1,13 @@
+import copy
 import os
 import re
 
 from django.conf import settings
+from django.core.handlers.exception import convert_exception_to_response
+from django.core.urlresolvers import RegexURLResolver, Resolver404, get_resolver
 from django.utils import timezone
 from django.utils.deprecation import MiddlewareMixin
+from django.utils.module_loading import import_string
 from django.contrib.auth.middleware import RemoteUserMiddleware
 
 from mozilla_cloud_services_logger.django.middleware import (
@@ -65,3 +69,84 @@ class NormandyWhiteNoiseMiddleware(WhiteNoiseMiddleware):
         # 32 is for content addressed files, like images or fonts, which use "[hash].[ext]"
         match = re.match(r'^.*([a-f0-9]{20}|[a-f0-9]{32})\.[\w\d]+$', filename)
         return bool(match)
+
+
+def filter_short_circuit_patterns(patterns):
+    """
+    Return the URL patterns and resolvers from `patterns` that lead to
+    views marked with `short_circuit_middlewares`.
+    """
+    filtered = []
+    for pattern in patterns:
+        if isinstance(pattern, RegexURLResolver):
+            children = filter_short_circuit_patterns(pattern.url_patterns)
+            if children:
+                resolver = copy.copy(pattern)
+                resolver.url_patterns = children
+                filtered.append(resolver)
+        elif getattr(pattern.callback, 'short_circuit_middlewares', False):
+            filtered.append(pattern)
+    return filtered
+
+
+class ShortCircuitMiddleware(object):
+    """
+    Sends requests for views marked with `short_circuit_middlewares`
+    through the shorter list of middleware in
+    `settings.SHORT_CIRCUIT_MIDDLEWARE`, and then straight to the view.
+    Any middleware listed after this one in `settings.MIDDLEWARE` is
+    skipped, as is Django's own URL resolution.
+
+    Requests are first checked against a copy of the URLconf holding
+    only the marked views, so other requests are only resolved once, by
+    Django.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self._short_circuit_resolvers = {}
+
+        handler = convert_exception_to_response(self.call_view)
+        for middleware_path in reversed(settings.SHORT_CIRCUIT_MIDDLEWARE):
+            middleware = import_string(middleware_path)
+            handler = convert_exception_to_response(middleware(handler))
+        self.short_circuit_handler = handler
+
+    def get_short_circuit_resolver(self, resolver):
+        short_circuit_resolver = self._short_circuit_resolvers.get(resolver)
+        if short_circuit_resolver is None:
+            short_circuit_resolver = copy.copy(resolver)
+            short_circuit_resolver.url_patterns = filter_short_circuit_patterns(
+                resolver.url_patterns)
+            self._short_circuit_resolvers[resolver] = short_circuit_resolver
+        return short_circuit_resolver
+
+    def __call__(self, request):
+        resolver = get_resolver(getattr(request, 'urlconf', None))
+        try:
+            self.get_short_circuit_resolver(resolver).resolve(request.path_info)
+        except Resolver404:
+            return self.get_response(request)
+
+        # An earlier pattern in the full URLconf may still take the request.
+        try:
+            match = resolver.resolve(request.path_info)
+        except Resolver404:
+            return self.get_response(request)
+
+        if not getattr(match.func, 'short_circuit_middlewares', False):
+            return self.get_response(request)
+
+        request.resolver_match = match
+        return self.short_circuit_handler(request)
+
+    def call_view(self, request):
+        match = request.resolver_match
+        response = match.func(request, *match.args, **match.kwargs)
+
+        # Template and API responses are normally rendered by the handler,
+        # which is being skipped.
+        if hasattr(response, 'render') and callable(response.render):
+            response = response.render()
+
+        return response
@@ -0,0 +1,75 @@
+import gzip
+
+from normandy.base.api.compression import (
+    CompressedContent,
+    CompressedContentCache,
+    get_accepted_codings,
+    parse_accept_encoding,
+)
+
+
+CONTENT = b'console.log("hello");\n' * 100
+
+
+def test_parse_accept_encoding():
+    assert parse_accept_encoding('gzip, deflate;q=0.5, br;q=0, *;q=bad') == {
+        'gzip': 1.0,
+        'deflate': 0.5,
+        'br': 0.0,
+        '*': 0.0,
+    }
+    assert parse_accept_encoding('') == {}
+
+
+def test_get_accepted_codings():
+    assert 'gzip' in get_accepted_codings('gzip')
+    assert 'gzip' in get_accepted_codings('*')
+    assert 'gzip' not in get_accepted_codings('gzip;q=0')
+    assert 'gzip' not in get_accepted_codings('br;q=1, *;q=0')
+    assert get_accepted_codings('br') == []
+    assert get_accepted_codings('') == []
+
+
+class TestCompressedContent(object):
+    def test_it_compresses_with_gzip(self):
+        compressed = CompressedContent(CONTENT)
+        assert gzip.decompress(compressed.encodings['gzip']) == CONTENT
+
+    def test_it_discards_larger_copies(self):
+        compressed = CompressedContent(b'a')
+        assert compressed.encodings == {}
+        assert compressed.encode('gzip') == (None, b'a')
+
+    def test_encode_uses_accepted_coding(self):
+        compressed = CompressedContent(CONTENT)
+        assert compressed.encode('gzip') == ('gzip', compressed.encodings['gzip'])
+        assert compressed.encode('*') == ('gzip', compressed.encodings['gzip'])
+
+    def test_encode_falls_back_to_identity(self):
+        compressed = CompressedContent(CONTENT)
+        assert compressed.encode('') == (None, CONTENT)
+        assert compressed.encode('deflate') == (None, CONTENT)
+        assert compressed.encode('br') == (None, CONTENT)
+        assert compressed.encode('gzip;q=0, br;q=0') == (None, CONTENT)
+
+
+class TestCompressedContentCache(object):
+    def test_it_builds_once_per_key(self):
+        cache = CompressedContentCache(max_entries=4)
+        calls = []
+
+        def build():
+            calls.append(1)
+            return CONTENT
+
+        compressed = cache.get('a', build)
+        assert compressed.content == CONTENT
+        assert cache.get('a', build) is compressed
+        assert len(calls) == 1
+
+    def test_it_is_bounded(self):
+        cache = CompressedContentCache(max_entries=2)
+        for key in ['a', 'b', 'c']:
+            cache.get(key, lambda: key.encode())
+        assert list(cache._entries.keys()) == ['b', 'c']
+        assert len(cache) == 2
@@ -1,6 +1,6 @@
 from django.http import HttpResponse
 
-from normandy.base.decorators import api_cache_control
+from normandy.base.decorators import api_cache_control, api_etag, etag_matches
 
 
 class TestApiCacheControl(object):
@@ -43,3 +43,73 @@ class TestApiCacheControl(object):
         assert 'public' in response['Cache-Control']
         assert 'max-age=44' in response['Cache-Control']
         assert 'no-transform' in response['Cache-Control']
+
+
+class TestApiEtag(object):
+    class View(object):
+        def get_etag(self, request):
+            return 'abc123'
+
+        @api_etag(get_etag)
+        def get(self, request):
+            return HttpResponse('content')
+
+    def test_it_adds_etags(self, rf):
+        response = self.View().get(rf.get('/foo/bar'))
+        assert response.status_code == 200
+        assert response['ETag'] == '"abc123"'
+
+    def test_it_returns_not_modified(self, rf):
+        request = rf.get('/foo/bar', HTTP_IF_NONE_MATCH='"abc123"')
+        response = self.View().get(request)
+        assert response.status_code == 304
+        assert response['ETag'] == '"abc123"'
+
+    def test_it_matches_etags_for_accepted_codings(self, rf):
+        request = rf.get(
+            '/foo/bar', HTTP_IF_NONE_MATCH='"abc123-gzip"', HTTP_ACCEPT_ENCODING='gzip')
+        response = self.View().get(request)
+        assert response.status_code == 304
+        assert response['ETag'] == '"abc123-gzip"'
+        assert 'Accept-Encoding' in response['Vary']
+
+    def test_it_ignores_etags_for_codings_not_accepted(self, rf):
+        request = rf.get('/foo/bar', HTTP_IF_NONE_MATCH='"abc123-gzip"')
+        response = self.View().get(request)
+        assert response.status_code == 200
+
+        request = rf.get(
+            '/foo/bar', HTTP_IF_NONE_MATCH='"abc123-gzip"', HTTP_ACCEPT_ENCODING='gzip;q=0')
+        response = self.View().get(request)
+        assert response.status_code == 200
+
+    def test_it_ignores_other_etags(self, rf):
+        request = rf.get('/foo/bar', HTTP_IF_NONE_MATCH='"def456"')
+        response = self.View().get(request)
+        assert response.status_code == 200
+        assert response.content == b'content'
+
+    def test_it_ignores_unsafe_methods(self, rf):
+        request = rf.post('/foo/bar', HTTP_IF_NONE_MATCH='"abc123"')
+        response = self.View().get(request)
+        assert response.status_code == 200
+        assert 'ETag' not in response
+
+
+class TestEtagMatches(object):
+    def test_it_works(self):
+        assert etag_matches('"a"', '"a"')
+        assert not etag_matches('"b"', '"a"')
+
+    def test_lists(self):
+        assert etag_matches('"b", "a"', '"a"')
+        assert not etag_matches('"b", "c"', '"a"')
+
+    def test_weak_etags(self):
+        assert etag_matches('W/"a"', '"a"')
+
+    def test_star(self):
+        assert etag_matches('*', '"a"')
+
+    def test_empty(self):
+        assert not etag_matches('', '"a"')
@@ -0,0 +1,127 @@
+from unittest.mock import MagicMock
+
+from django.conf.urls import url
+from django.core.urlresolvers import get_resolver
+from django.http import HttpResponse
+
+import pytest
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+
+from normandy.base.decorators import short_circuit_middlewares
+from normandy.base.middleware import RequestSummaryLogger, ShortCircuitMiddleware
+
+
+@short_circuit_middlewares
+def short_circuit_view(request, name):
+    return HttpResponse(f'hello {name}')
+
+
+@short_circuit_middlewares
+@api_view(['GET'])
+def short_circuit_api_view(request):
+    return Response({'hello': 'world'})
+
+
+def normal_view(request):
+    return HttpResponse('normal')
+
+
+def header_middleware(get_response):
+    def middleware(request):
+        response = get_response(request)
+        response['X-Short-Circuit'] = 'yes'
+        return response
+    return middleware
+
+
+urlpatterns = [
+    url(r'^short/(?P<name>\w+)/$', short_circuit_view),
+    url(r'^short-api/$', short_circuit_api_view),
+    url(r'^normal/$', normal_view),
+    url(r'^shadowed/$', normal_view),
+    url(r'^shadowed/$', short_circuit_view, {'name': 'shadowed'}),
+]
+
+
+class TestShortCircuitMiddleware(object):
+    @pytest.fixture(autouse=True)
+    def short_circuit_middleware(self, settings):
+        settings.SHORT_CIRCUIT_MIDDLEWARE = [f'{__name__}.header_middleware']
+
+    def make_middleware(self):
+        get_response = MagicMock()
+        get_response.return_value = HttpResponse('from get_response')
+        return ShortCircuitMiddleware(get_response), get_response
+
+    def test_it_calls_marked_views_directly(self, rf):
+        middleware, get_response = self.make_middleware()
+        request = rf.get('/short/world/')
+        request.urlconf = __name__
+
+        response = middleware(request)
+        assert response.content == b'hello world'
+        assert response['X-Short-Circuit'] == 'yes'
+        assert not get_response.called
+        assert request.resolver_match.kwargs == {'name': 'world'}
+
+    def test_it_renders_api_responses(self, rf):
+        middleware, get_response = self.make_middleware()
+        request = rf.get('/short-api/')
+        request.urlconf = __name__
+
+        response = middleware(request)
+        assert response.is_rendered
+        assert response.status_code == 200
+        assert not get_response.called
+
+    def test_it_passes_other_views_through(self, rf):
+        middleware, get_response = self.make_middleware()
+        request = rf.get('/normal/')
+        request.urlconf = __name__
+
+        response = middleware(request)
+        assert response.content == b'from get_response'
+        assert 'X-Short-Circuit' not in response
+
+    def test_it_passes_unknown_urls_through(self, rf):
+        middleware, get_response = self.make_middleware()
+        request = rf.get('/does-not-exist/')
+        request.urlconf = __name__
+
+        response = middleware(request)
+        assert response.content == b'from get_response'
+        assert 'X-Short-Circuit' not in response
+
+    def test_it_respects_url_order(self, rf):
+        middleware, get_response = self.make_middleware()
+        request = rf.get('/shadowed/')
+        request.urlconf = __name__
+
+        response = middleware(request)
+        assert response.content == b'from get_response'
+
+    def test_it_only_resolves_marked_views_in_full(self, rf, mocker):
+        middleware, get_response = self.make_middleware()
+        request = rf.get('/normal/')
+        request.urlconf = __name__
+        # Build the copy of the URLconf that only has the marked views.
+        middleware(request)
+
+        resolver = get_resolver(__name__)
+        resolve = mocker.patch.object(resolver, 'resolve', wraps=resolver.resolve)
+        middleware(request)
+        assert not resolve.called
+
+        request = rf.get('/short/world/')
+        request.urlconf = __name__
+        middleware(request)
+        assert resolve.call_count == 1
+
+
+def test_short_circuited_views_are_logged(client, mocker):
+    process_response = mocker.patch.object(
+        RequestSummaryLogger, 'process_response', side_effect=lambda request, response: response)
+    res = client.get('/__lbheartbeat__')
+    assert res.status_code == 200
+    assert process_response.called
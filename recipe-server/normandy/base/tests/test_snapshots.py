@@ -0,0 +1,58 @@
+import gzip
+from unittest.mock import patch
+
+from normandy.base.api.snapshots import SnapshotStore
+
+
+class TestSnapshotStore(object):
+    def test_it_builds_once_per_version(self):
+        store = SnapshotStore('test-builds-once')
+        calls = []
+
+        def build():
+            calls.append(1)
+            return b'[1,2,3]'
+
+        snapshot = store.get('v1', build)
+        assert snapshot.content == b'[1,2,3]'
+        assert store.get('v1', build) is snapshot
+        assert len(calls) == 1
+
+    def test_it_shares_content_through_the_cache(self):
+        store = SnapshotStore('test-shares-content')
+        store.get('v1', lambda: b'{"a":1}')
+        other_store = SnapshotStore('test-shares-content')
+        snapshot = other_store.get('v1', lambda: b'should not be built')
+        assert snapshot.content == b'{"a":1}'
+
+    def test_unshared_stores_skip_the_cache(self):
+        store = SnapshotStore('test-unshared', shared=False)
+        with patch('normandy.base.api.snapshots.cache') as mock_cache:
+            snapshot = store.get('v1', lambda: b'{"a":1}')
+            assert not mock_cache.get.called
+            assert not mock_cache.set.called
+        assert snapshot.content == b'{"a":1}'
+
+    def test_it_is_bounded(self):
+        store = SnapshotStore('test-is-bounded', max_entries=2)
+        for version in ['v1', 'v2', 'v3']:
+            store.get(version, lambda: version.encode())
+        assert list(store._snapshots.keys()) == ['v2', 'v3']
+
+    def test_it_shares_compressed_copies_through_the_cache(self):
+        content = b'[' + b'{"a":1},' * 100 + b'{"a":1}]'
+        store = SnapshotStore('test-shares-compressed')
+        snapshot = store.get('v1', lambda: content)
+        assert gzip.decompress(snapshot.compressed.encodings['gzip']) == content
+
+        other_store = SnapshotStore('test-shares-compressed')
+        with patch('normandy.base.api.compression.gzip') as mock_gzip:
+            other_snapshot = other_store.get('v1', lambda: b'should not be built')
+            assert not mock_gzip.compress.called
+        assert other_snapshot.compressed.encodings == snapshot.compressed.encodings
+
+    def test_content_hash(self):
+        store = SnapshotStore('test-content-hash')
+        a = store.get('v1', lambda: b'same')
+        b = store.get('v2', lambda: b'same')
+        assert a.content_hash == b.content_hash
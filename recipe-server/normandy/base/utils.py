@@ -5,7 +5,6 @@ from hashlib import sha384
 from urllib.parse import parse_qs, urlencode, urlparse, urlunparse
 
 from django.conf import settings
-from django.db.models import Count
 from django.utils import timezone
 
 
@@ -56,20 +55,6 @@ def canonical_json_dumps(data):
     return json.dumps(data, ensure_ascii=True, separators=(',', ':'), sort_keys=True)
 
 
-def filter_m2m(qs, field, values):
-    """
-    Filters a queryset by an exact list of many to many relations.
-    """
-    values = list(values)
-
-    qs = qs.annotate(_count=Count(field)).filter(_count=len(values))
-
-    if len(values):
-        qs = qs.filter(**{'{}__in'.format(field): values})
-
-    return qs
-
-
 def sri_hash(data):
     """
     Return a subresource integrity attribute string for a file
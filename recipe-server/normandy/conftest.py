@@ -3,7 +3,8 @@ from rest_framework.test import APIClient
 
 from normandy.base.tests import UserFactory, skip_except_in_ci
 from normandy.recipes import geolocation as geolocation_module
-from normandy.recipes.tests import fake_sign
+from normandy.recipes import signing
+from normandy.recipes.tests import FakeAutograph, FakeX5uServer, fake_sign
 
 
 @pytest.fixture
@@ -19,7 +20,7 @@ def api_client():
 def geolocation():
     """Fixture to load geolocation data."""
     geolocation_module.load_geoip_database()
-    if geolocation_module.geoip_reader is None:
+    if geolocation_module.geoip_database.reader is None:
         skip_except_in_ci()
     else:
         return geolocation_module
@@ -30,3 +31,27 @@ def mocked_autograph(mocker):
     mocked = mocker.patch('normandy.recipes.models.Autographer')
     mocked.return_value.sign_data.side_effect = fake_sign
     return mocked
+
+
+@pytest.fixture
+def fake_autograph(settings):
+    """Fixture to run a local fake Autograph server and configure signing to use it."""
+    autograph = FakeAutograph()
+    autograph.start()
+    settings.AUTOGRAPH_URL = autograph.url
+    settings.AUTOGRAPH_HAWK_ID = 'hawk id'
+    settings.AUTOGRAPH_HAWK_SECRET_KEY = 'hawk secret key'
+    settings.AUTOGRAPH_SIGNING_RETRY_BACKOFF = 0
+    yield autograph
+    autograph.stop()
+
+
+@pytest.fixture
+def fake_x5u_server():
+    """Fixture to serve certificate chains from a local server."""
+    server = FakeX5uServer()
+    server.start()
+    signing.certificate_chains.clear()
+    yield server
+    server.stop()
+    signing.certificate_chains.clear()
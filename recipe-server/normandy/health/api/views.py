@@ -1,11 +1,11 @@
 import json
 import logging
 import os
+import time
 from functools import lru_cache
 from datetime import datetime
 
 from django.conf import settings
-from django.core.checks.registry import registry as checks_registry
 from django.core.checks import messages as checks_messages
 
 from rest_framework import status
@@ -14,6 +14,8 @@ from rest_framework.response import Response
 from statsd.defaults.django import statsd
 
 from normandy.base.decorators import short_circuit_middlewares
+from normandy.health.results import CheckResults
+from normandy.recipes import geolocation
 
 
 logger = logging.getLogger(__name__)
@@ -64,6 +66,7 @@ def version(request):
     commit = version_info['commit']
     version = version_info['version']
     build_time = version_info['build_time']
+    geoip_build_time = geolocation.get_database_build_time()
 
     return Response({
         'source': repo_url,
@@ -72,6 +75,7 @@ def version(request):
         'configuration': os.environ.get('DJANGO_CONFIGURATION'),
         'version': version,
         'build_time': build_time.isoformat(),
+        'geoip_database_build_time': geoip_build_time.isoformat() if geoip_build_time else None,
     })
 
 
@@ -88,18 +92,18 @@ def lbheartbeat(request):
 @api_view(['GET'])
 @authentication_classes([])
 def heartbeat(request):
-    all_checks = checks_registry.get_checks(include_deployment_checks=not settings.DEBUG)
-
     details = {}
     statuses = {}
+    ages = {}
     level = 0
+    now = time.time()
 
-    for check in all_checks:
-        detail = heartbeat_check_detail(check)
-        statuses[check.__name__] = detail['status']
+    for name, (checked_at, detail) in check_results.get_all().items():
+        statuses[name] = detail['status']
+        ages[name] = round(now - checked_at, 1)
         level = max(level, detail['level'])
         if detail['level'] > 0:
-            details[check.__name__] = detail
+            details[name] = detail
 
     if level < checks_messages.WARNING:
         res_status = status.HTTP_200_OK
@@ -112,6 +116,7 @@ def heartbeat(request):
         'status': heartbeat_level_to_text(level),
         'checks': statuses,
         'details': details,
+        'ages': ages,
     }, status=res_status)
 
 
@@ -139,6 +144,9 @@ def heartbeat_check_detail(check):
     }
 
 
+check_results = CheckResults(heartbeat_check_detail)
+
+
 @api_view(['POST'])
 def cspreport(request):
     try:
@@ -0,0 +1,119 @@
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.checks import messages as checks_messages
+from django.core.checks.registry import registry as checks_registry
+from django.db import connections
+
+
+ERROR_REFRESHING_CHECKS = 'normandy.health.E004'
+ERROR_STALE_CHECK_RESULT = 'normandy.health.E005'
+
+
+logger = logging.getLogger(__name__)
+
+
+class CheckResults(object):
+    """
+    Caches the results of the checks run by the heartbeat.
+
+    A check's result is reused for `settings.HEARTBEAT_CHECK_TTL` seconds,
+    or for the number of seconds given for the check's name in
+    `settings.HEARTBEAT_CHECK_TTLS`. If
+    `settings.HEARTBEAT_REFRESH_IN_BACKGROUND` is true, expired results are
+    re-run by a background thread instead of during requests, so the only
+    check a request waits for is one that has never run. If the thread
+    falls behind, results older than `settings.HEARTBEAT_CHECK_MAX_AGE`
+    are reported as errors.
+    """
+
+    def __init__(self, run_check):
+        self.run_check = run_check
+        self._results = {}
+        self._lock = threading.Lock()
+        self._refresher = None
+
+    def get_checks(self):
+        return checks_registry.get_checks(include_deployment_checks=not settings.DEBUG)
+
+    def get_ttl(self, check):
+        return settings.HEARTBEAT_CHECK_TTLS.get(check.__name__, settings.HEARTBEAT_CHECK_TTL)
+
+    def is_expired(self, check, result):
+        checked_at, detail = result
+        return time.time() - checked_at >= self.get_ttl(check)
+
+    def is_stale(self, check, result):
+        checked_at, detail = result
+        # A result can't be refreshed before it expires, so allow at least
+        # one refresh interval past its TTL.
+        max_age = max(settings.HEARTBEAT_CHECK_MAX_AGE,
+                      self.get_ttl(check) + settings.HEARTBEAT_REFRESH_INTERVAL)
+        return time.time() - checked_at >= max_age
+
+    def refresh(self, check):
+        result = (time.time(), self.run_check(check))
+        with self._lock:
+            self._results[check.__name__] = result
+        return result
+
+    def refresh_expired(self):
+        for check in self.get_checks():
+            result = self._results.get(check.__name__)
+            if result is None or self.is_expired(check, result):
+                self.refresh(check)
+
+    def get_all(self):
+        """
+        Return a dictionary mapping each check's name to a tuple of the
+        time it was last run and its result.
+        """
+        background = settings.HEARTBEAT_REFRESH_IN_BACKGROUND
+        if background:
+            self.start_refresher()
+
+        results = {}
+        for check in self.get_checks():
+            result = self._results.get(check.__name__)
+            if result is None or (not background and self.is_expired(check, result)):
+                result = self.refresh(check)
+            elif background and self.is_stale(check, result):
+                checked_at, detail = result
+                result = (checked_at, {
+                    'status': 'error',
+                    'level': checks_messages.ERROR,
+                    'messages': {
+                        ERROR_STALE_CHECK_RESULT: (
+                            f'Result is {time.time() - checked_at:.0f} seconds old'),
+                    },
+                })
+            results[check.__name__] = result
+        return results
+
+    def start_refresher(self):
+        with self._lock:
+            if self._refresher is None or not self._refresher.is_alive():
+                self._refresher = threading.Thread(
+                    target=self._refresh_forever, name='heartbeat-refresher', daemon=True)
+                self._refresher.start()
+
+    def _refresh_forever(self):
+        while True:
+            try:
+                self.refresh_expired()
+            except Exception:
+                logger.exception(
+                    'Could not refresh heartbeat checks',
+                    extra={'code': ERROR_REFRESHING_CHECKS}
+                )
+            finally:
+                # Don't keep database connections open between refreshes.
+                for connection in connections.all():
+                    connection.close()
+            time.sleep(settings.HEARTBEAT_REFRESH_INTERVAL)
+
+    def clear(self):
+        with self._lock:
+            self._results.clear()
@@ -17,6 +17,9 @@ def test_version(client, mocker):
         'version': '<tag>',
         'build_time': build_time,
     }
+    get_database_build_time = mocker.patch(
+        'normandy.recipes.geolocation.get_database_build_time')
+    get_database_build_time.return_value = datetime(2017, 5, 2, 8, 0)
 
     res = client.get('/__version__')
     assert res.status_code == 200
@@ -27,6 +30,7 @@ def test_version(client, mocker):
         'configuration': 'Test',
         'version': '<tag>',
         'build_time': build_time.isoformat(),
+        'geoip_database_build_time': '2017-05-02T08:00:00',
     }
 
 
@@ -39,6 +43,31 @@ def test_lbheartbeat_makes_no_db_queries(client):
     assert len(queries) == 0
 
 
+def test_lbheartbeat_skips_middleware(client, mocker):
+    process_request = mocker.patch(
+        'django.contrib.sessions.middleware.SessionMiddleware.process_request')
+    res = client.get('/__lbheartbeat__')
+    assert res.status_code == 200
+    assert not process_request.called
+
+
+def test_heartbeat_includes_ages(client, mocker):
+    mocker.patch('normandy.health.api.views.time').time.return_value = 1030.5
+    check_results = mocker.patch('normandy.health.api.views.check_results')
+    check_results.get_all.return_value = {
+        'first_check': (1000, {'status': 'ok', 'level': 0, 'messages': {}}),
+    }
+
+    res = client.get('/__heartbeat__')
+    assert res.status_code == 200
+    assert res.data == {
+        'status': 'ok',
+        'checks': {'first_check': 'ok'},
+        'details': {},
+        'ages': {'first_check': 30.5},
+    }
+
+
 class TestGetVersionInfo(object):
 
     @pytest.fixture
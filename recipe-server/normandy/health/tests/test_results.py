@@ -0,0 +1,113 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from normandy.health.results import CheckResults, ERROR_STALE_CHECK_RESULT
+
+
+def first_check(app_configs, **kwargs):
+    return []
+
+
+def second_check(app_configs, **kwargs):
+    return []
+
+
+@pytest.fixture
+def mock_time(mocker):
+    mock_time = mocker.patch('normandy.health.results.time')
+    mock_time.time.return_value = 1000
+    return mock_time
+
+
+@pytest.fixture
+def check_results(mocker, settings):
+    settings.HEARTBEAT_CHECK_TTL = 60
+    settings.HEARTBEAT_CHECK_TTLS = {}
+    settings.HEARTBEAT_REFRESH_IN_BACKGROUND = False
+    settings.HEARTBEAT_REFRESH_INTERVAL = 5
+    settings.HEARTBEAT_CHECK_MAX_AGE = 300
+
+    run_check = MagicMock()
+    run_check.side_effect = lambda check: {'status': 'ok', 'level': 0, 'messages': {}}
+    check_results = CheckResults(run_check)
+    mocker.patch.object(check_results, 'get_checks', return_value=[first_check, second_check])
+    return check_results
+
+
+class TestCheckResults(object):
+    def test_it_runs_each_check(self, check_results, mock_time):
+        results = check_results.get_all()
+        assert results == {
+            'first_check': (1000, {'status': 'ok', 'level': 0, 'messages': {}}),
+            'second_check': (1000, {'status': 'ok', 'level': 0, 'messages': {}}),
+        }
+        assert check_results.run_check.call_count == 2
+
+    def test_it_reuses_results_until_they_expire(self, check_results, mock_time):
+        check_results.get_all()
+
+        mock_time.time.return_value = 1059
+        check_results.get_all()
+        assert check_results.run_check.call_count == 2
+
+        mock_time.time.return_value = 1060
+        results = check_results.get_all()
+        assert check_results.run_check.call_count == 4
+        assert results['first_check'][0] == 1060
+
+    def test_it_uses_per_check_ttls(self, check_results, mock_time, settings):
+        settings.HEARTBEAT_CHECK_TTLS = {'first_check': 10}
+        check_results.get_all()
+
+        mock_time.time.return_value = 1010
+        check_results.get_all()
+        check_results.run_check.assert_called_with(first_check)
+        assert check_results.run_check.call_count == 3
+
+    def test_background_refreshing(self, check_results, mock_time, mocker, settings):
+        settings.HEARTBEAT_REFRESH_IN_BACKGROUND = True
+        start_refresher = mocker.patch.object(check_results, 'start_refresher')
+
+        check_results.get_all()
+        assert start_refresher.called
+        assert check_results.run_check.call_count == 2
+
+        # Expired results are returned as they are, and left for the refresher
+        mock_time.time.return_value = 2000
+        results = check_results.get_all()
+        assert check_results.run_check.call_count == 2
+        assert results['first_check'][0] == 1000
+
+        check_results.refresh_expired()
+        assert check_results.run_check.call_count == 4
+        assert check_results.get_all()['first_check'][0] == 2000
+
+    def test_stale_results_are_errors(self, check_results, mock_time, mocker, settings):
+        settings.HEARTBEAT_REFRESH_IN_BACKGROUND = True
+        mocker.patch.object(check_results, 'start_refresher')
+        check_results.get_all()
+
+        mock_time.time.return_value = 1299
+        assert check_results.get_all()['first_check'][1]['status'] == 'ok'
+
+        # The refresher has fallen behind, so the result can't be trusted.
+        mock_time.time.return_value = 1300
+        checked_at, detail = check_results.get_all()['first_check']
+        assert checked_at == 1000
+        assert detail['status'] == 'error'
+        assert ERROR_STALE_CHECK_RESULT in detail['messages']
+
+    def test_stale_results_allow_for_long_ttls(self, check_results, mock_time, mocker, settings):
+        settings.HEARTBEAT_REFRESH_IN_BACKGROUND = True
+        settings.HEARTBEAT_CHECK_TTLS = {'first_check': 600}
+        mocker.patch.object(check_results, 'start_refresher')
+        check_results.get_all()
+
+        mock_time.time.return_value = 1604
+        results = check_results.get_all()
+        assert results['first_check'][1]['status'] == 'ok'
+        assert results['second_check'][1]['status'] == 'error'
+
+        mock_time.time.return_value = 1605
+        assert check_results.get_all()['first_check'][1]['status'] == 'error'
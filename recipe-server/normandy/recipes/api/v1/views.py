@@ -1,6 +1,10 @@
+import hashlib
+
 from django.conf import settings
 from django.db import transaction
 from django.db.models import Q
+from django.http import HttpResponse
+from django.views.decorators.http import require_safe
 
 import django_filters
 from rest_framework import generics, permissions, status, views, viewsets
@@ -10,10 +14,12 @@ from rest_framework.response import Response
 
 from normandy.base.api import UpdateOrCreateModelViewSet
 from normandy.base.api.filters import CaseInsensitiveBooleanFilter
-from normandy.base.api.mixins import CachingViewsetMixin
+from normandy.base.api.mixins import CachingViewsetMixin, SnapshotListMixin
 from normandy.base.api.permissions import AdminEnabledOrReadOnly
-from normandy.base.api.renderers import JavaScriptRenderer
-from normandy.base.decorators import api_cache_control
+from normandy.base.api.compression import CompressedContentCache, CompressedResponse
+from normandy.base.api.renderers import CanonicalJSONRenderer, JavaScriptRenderer
+from normandy.base.api.snapshots import SnapshotResponse, SnapshotStore
+from normandy.base.decorators import api_cache_control, api_etag, short_circuit_middlewares
 from normandy.recipes.models import (
     Action,
     ApprovalRequest,
@@ -32,16 +38,37 @@ from normandy.recipes.api.v1.serializers import (
     RecipeRevisionSerializer,
     SignedRecipeSerializer,
 )
+from normandy.recipes.targeting import estimate_reach, generate_client_contexts
+
+
+signed_recipe_snapshots = SnapshotStore('signed-recipes')
+action_snapshots = SnapshotStore('actions')
 
+#: Encoded and compressed action implementations, keyed by action name and
+#: implementation hash.
+action_implementations = CompressedContentCache(
+    settings.ACTION_IMPLEMENTATION_CACHE_MAX_ENTRIES)
 
-class ActionViewSet(CachingViewsetMixin, viewsets.ReadOnlyModelViewSet):
+
+class ActionViewSet(CachingViewsetMixin, SnapshotListMixin, viewsets.ReadOnlyModelViewSet):
     """Viewset for viewing recipe actions."""
     queryset = Action.objects.all()
     serializer_class = ActionSerializer
+    list_snapshots = action_snapshots
 
     lookup_field = 'name'
     lookup_value_regex = r'[_\-\w]+'
 
+    def get_list_version(self, request):
+        # Implementation URLs are absolute unless a CDN is in use.
+        hasher = hashlib.sha256()
+        hasher.update(str(settings.CDN_URL or request.build_absolute_uri('/')).encode())
+        actions = self.filter_queryset(self.get_queryset()).values_list(
+            'name', 'implementation_hash', 'arguments_schema_json')
+        for row in actions:
+            hasher.update(repr(row).encode())
+        return hasher.hexdigest()
+
 
 class ActionImplementationView(generics.RetrieveAPIView):
     """
@@ -56,11 +83,15 @@ class ActionImplementationView(generics.RetrieveAPIView):
 
     @api_cache_control(max_age=settings.ACTION_IMPLEMENTATION_CACHE_TIME)
     def retrieve(self, request, name, impl_hash):
-        action = self.get_object()
-        if impl_hash != action.implementation_hash:
-            raise NotFound('Hash does not match current stored action.')
+        # The hash identifies the implementation's content, so once it has
+        # been loaded it can be served without querying the database.
+        def build():
+            action = self.get_object()
+            if impl_hash != action.implementation_hash:
+                raise NotFound('Hash does not match current stored action.')
+            return action.implementation.encode(JavaScriptRenderer.charset)
 
-        return Response(action.implementation)
+        return CompressedResponse(action_implementations.get((name, impl_hash), build))
 
 
 class RecipeFilters(django_filters.FilterSet):
@@ -73,7 +104,7 @@ class RecipeFilters(django_filters.FilterSet):
 
 class RecipeViewSet(CachingViewsetMixin, UpdateOrCreateModelViewSet):
     """Viewset for viewing and uploading recipes."""
-    queryset = Recipe.objects.all()
+    queryset = Recipe.objects.for_serialization()
     serializer_class = RecipeSerializer
     filter_class = RecipeFilters
     permission_classes = [
@@ -108,6 +139,17 @@ class RecipeViewSet(CachingViewsetMixin, UpdateOrCreateModelViewSet):
 
         return queryset
 
+    def get_signed_queryset(self):
+        # Signed recipes only need the stored filter expression, not the
+        # targeting it was built from.
+        queryset = self.filter_queryset(self.get_queryset()).prefetch_related(None)
+        return queryset.exclude(signature=None)
+
+    def get_signed_version(self, request):
+        if getattr(self, '_signed_version', None) is None:
+            self._signed_version = self.get_signed_queryset().signed_version()
+        return self._signed_version
+
     @transaction.atomic
     def create(self, request, *args, **kwargs):
         return super().create(request, *args, **kwargs)
@@ -118,16 +160,34 @@ class RecipeViewSet(CachingViewsetMixin, UpdateOrCreateModelViewSet):
 
     @list_route(methods=['GET'])
     @api_cache_control()
+    @api_etag(get_signed_version)
     def signed(self, request, pk=None):
-        recipes = self.filter_queryset(self.get_queryset()).exclude(signature=None)
-        serializer = SignedRecipeSerializer(recipes, many=True)
-        return Response(serializer.data)
+        recipes = self.get_signed_queryset()
+
+        def build():
+            serializer = SignedRecipeSerializer(recipes, many=True)
+            return CanonicalJSONRenderer().render(serializer.data)
+
+        snapshot = signed_recipe_snapshots.get(self.get_signed_version(request), build)
+        return SnapshotResponse(snapshot)
+
+    @list_route(methods=['GET'], permission_classes=[permissions.IsAdminUser])
+    def verify_signatures(self, request, pk=None):
+        recipes = self.filter_queryset(self.get_queryset())
+        return Response(recipes.verify_signatures())
+
+    @list_route(methods=['GET'], permission_classes=[permissions.IsAdminUser])
+    def reach(self, request, pk=None):
+        recipes = self.filter_queryset(self.get_queryset()).filter(enabled=True)
+        contexts = generate_client_contexts(
+            settings.TARGETING_ESTIMATE_SAMPLE_SIZE, seed=request.GET.get('seed'))
+        return Response(estimate_reach(recipes, contexts))
 
     @detail_route(methods=['GET'])
     @api_cache_control()
     def history(self, request, pk=None):
         recipe = self.get_object()
-        serializer = RecipeRevisionSerializer(recipe.revisions.all(), many=True,
+        serializer = RecipeRevisionSerializer(recipe.revisions.for_serialization(), many=True,
                                               context={'request': request})
         return Response(serializer.data)
 
@@ -152,7 +212,7 @@ class RecipeViewSet(CachingViewsetMixin, UpdateOrCreateModelViewSet):
 
 
 class RecipeRevisionViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = RecipeRevision.objects.all()
+    queryset = RecipeRevision.objects.for_serialization()
     serializer_class = RecipeRevisionSerializer
     permission_classes = [
         AdminEnabledOrReadOnly,
@@ -230,15 +290,19 @@ class ApprovalRequestViewSet(viewsets.ReadOnlyModelViewSet):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class ClassifyClient(views.APIView):
-    authentication_classes = []
-    permission_classes = []
-    serializer_class = ClientSerializer
+@short_circuit_middlewares
+@require_safe
+def classify_client(request):
+    """
+    Return the country and time of the request, as seen by the server.
 
-    def get(self, request, format=None):
-        client = Client(request)
-        serializer = self.serializer_class(client, context={'request': request})
-        return Response(serializer.data)
+    Every client requests this and it can't be cached by the CDN, so it
+    skips DRF's view handling and most middleware. The response is still
+    serialized and rendered the same way as the rest of the API.
+    """
+    renderer = CanonicalJSONRenderer()
+    content = renderer.render(ClientSerializer(Client(request)).data)
+    return HttpResponse(content, content_type=renderer.media_type)
 
 
 class Filters(views.APIView):
@@ -1,4 +1,3 @@
-from pyjexl import JEXL
 from rest_framework import serializers
 
 from normandy.base.api.serializers import UserSerializer
@@ -12,7 +11,10 @@ from normandy.recipes.models import (
     Recipe,
     RecipeRevision,
 )
-from normandy.recipes.validators import JSONSchemaValidator
+from normandy.recipes.validators import (
+    get_arguments_validator,
+    get_filter_expression_errors,
+)
 
 
 class ActionSerializer(serializers.ModelSerializer):
@@ -133,32 +135,21 @@ class RecipeSerializer(serializers.ModelSerializer):
         return self.update(recipe, validated_data)
 
     def validate_extra_filter_expression(self, value):
-        jexl = JEXL()
-
-        # Add mock transforms for validation. See
-        # http://normandy.readthedocs.io/en/latest/user/filter_expressions.html#transforms
-        # for a list of what transforms we expect to be available.
-        jexl.add_transform('date', lambda x: x)
-        jexl.add_transform('stableSample', lambda x: x)
-        jexl.add_transform('bucketSample', lambda x: x)
-        jexl.add_transform('preferenceValue', lambda x: x)
-        jexl.add_transform('preferenceIsUserSet', lambda x: x)
-        jexl.add_transform('preferenceExists', lambda x: x)
-
-        errors = list(jexl.validate(value))
+        errors = get_filter_expression_errors(value)
         if errors:
-            raise serializers.ValidationError(errors)
+            raise serializers.ValidationError(list(errors))
 
         return value
 
     def validate_arguments(self, value):
         # Get the schema associated with the selected action
         try:
-            schema = Action.objects.get(pk=self.initial_data.get('action_id')).arguments_schema
+            schema_json = (Action.objects.values_list('arguments_schema_json', flat=True)
+                           .get(pk=self.initial_data.get('action_id')))
+            schemaValidator = get_arguments_validator(schema_json)
         except:
             raise serializers.ValidationError('Could not find arguments schema.')
 
-        schemaValidator = JSONSchemaValidator(schema)
         errorResponse = {}
         errors = sorted(schemaValidator.iter_errors(value), key=lambda e: e.path)
 
@@ -1,3 +1,6 @@
+import hashlib
+
+from django.conf import settings
 from django.db import transaction
 from django.db.models import Q
 
@@ -8,14 +11,17 @@ from rest_framework.response import Response
 
 from normandy.base.api import UpdateOrCreateModelViewSet
 from normandy.base.api.filters import CaseInsensitiveBooleanFilter
-from normandy.base.api.mixins import CachingViewsetMixin
+from normandy.base.api.mixins import CachingViewsetMixin, SnapshotListMixin
+from normandy.base.api.pagination import CursorPagination
 from normandy.base.api.permissions import AdminEnabledOrReadOnly
+from normandy.base.api.snapshots import SnapshotStore
 from normandy.base.decorators import api_cache_control
 from normandy.recipes.models import (
     Action,
     ApprovalRequest,
     Recipe,
-    RecipeRevision
+    RecipeListVersion,
+    RecipeRevision,
 )
 from normandy.recipes.api.v2.serializers import (
     ActionSerializer,
@@ -25,6 +31,11 @@ from normandy.recipes.api.v2.serializers import (
 )
 
 
+# Versions include query strings, which clients can vary freely, so
+# snapshots are only kept in each process's bounded memory.
+recipe_list_snapshots = SnapshotStore('v2-recipes', shared=False)
+
+
 class ActionViewSet(CachingViewsetMixin, viewsets.ReadOnlyModelViewSet):
     """Viewset for viewing recipe actions."""
     queryset = Action.objects.all()
@@ -39,18 +50,50 @@ class RecipeFilters(django_filters.FilterSet):
         fields = ['latest_revision__action', 'enabled']
 
 
-class RecipeViewSet(CachingViewsetMixin, UpdateOrCreateModelViewSet):
+class RecipeViewSet(CachingViewsetMixin, SnapshotListMixin, UpdateOrCreateModelViewSet):
     """Viewset for viewing and uploading recipes."""
-    queryset = Recipe.objects.all()
+    queryset = Recipe.objects.for_serialization()
     serializer_class = RecipeSerializer
     filter_class = RecipeFilters
+    pagination_class = CursorPagination
+    cursor_ordering = ('-id',)
+    list_snapshots = recipe_list_snapshots
     permission_classes = [
         permissions.DjangoModelPermissionsOrAnonReadOnly,
         AdminEnabledOrReadOnly,
     ]
 
+    def get_requested_fields(self):
+        """
+        Return the set of fields to serialize for recipes, limited by the
+        comma-separated `fields` and `omit` query parameters, or None if
+        every field was requested.
+        """
+        if self.request.method not in permissions.SAFE_METHODS:
+            return None
+
+        fields = self.request.GET.get('fields')
+        omit = self.request.GET.get('omit')
+        if not fields and not omit:
+            return None
+
+        requested = set(RecipeSerializer.Meta.fields)
+        if fields:
+            requested &= set(fields.split(','))
+        if omit:
+            requested -= set(omit.split(','))
+        return requested
+
+    def get_serializer(self, *args, **kwargs):
+        requested = self.get_requested_fields()
+        if requested is not None:
+            kwargs['exclude_fields'] = [
+                field for field in RecipeSerializer.Meta.fields if field not in requested
+            ]
+        return super().get_serializer(*args, **kwargs)
+
     def get_queryset(self):
-        queryset = self.queryset
+        queryset = Recipe.objects.for_serialization(self.get_requested_fields())
 
         if self.request.GET.get('status') == 'enabled':
             queryset = queryset.filter(enabled=True)
@@ -76,6 +119,43 @@ class RecipeViewSet(CachingViewsetMixin, UpdateOrCreateModelViewSet):
 
         return queryset
 
+    #: Query parameters that the recipe list understands. Other parameters
+    #: can't change the response, so they would only split the cache.
+    list_query_params = [
+        'channels',
+        'countries',
+        'cursor',
+        'enabled',
+        'fields',
+        'format',
+        'latest_revision__action',
+        'locales',
+        'omit',
+        'page_size',
+        'status',
+        'text',
+    ]
+
+    def get_list_version(self, request):
+        """
+        Return a digest identifying the recipes listed for this request,
+        without reading any recipes. It combines `RecipeListVersion`,
+        which is bumped whenever anything listed changes, with the
+        query parameters that pick the recipes and fields.
+        """
+        # Pagination links and implementation URLs are absolute unless a CDN
+        # is in use.
+        hasher = hashlib.sha256()
+        hasher.update(f'{RecipeListVersion.get()}\n{settings.CDN_URL}\n'.encode())
+        hasher.update(f'{request.build_absolute_uri(request.path)}\n'.encode())
+        for param in self.list_query_params:
+            for value in request.GET.getlist(param):
+                hasher.update(repr((param, value)).encode())
+        return hasher.hexdigest()
+
+    def can_snapshot_list(self, request):
+        return set(request.GET) <= set(self.list_query_params)
+
     @transaction.atomic
     def create(self, request, *args, **kwargs):
         return super().create(request, *args, **kwargs)
@@ -88,7 +168,7 @@ class RecipeViewSet(CachingViewsetMixin, UpdateOrCreateModelViewSet):
     @api_cache_control()
     def history(self, request, pk=None):
         recipe = self.get_object()
-        serializer = RecipeRevisionSerializer(recipe.revisions.all(), many=True,
+        serializer = RecipeRevisionSerializer(recipe.revisions.for_serialization(), many=True,
                                               context={'request': request})
         return Response(serializer.data)
 
@@ -113,8 +193,9 @@ class RecipeViewSet(CachingViewsetMixin, UpdateOrCreateModelViewSet):
 
 
 class RecipeRevisionViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = RecipeRevision.objects.all()
+    queryset = RecipeRevision.objects.for_serialization()
     serializer_class = RecipeRevisionSerializer
+    pagination_class = CursorPagination
     permission_classes = [
         AdminEnabledOrReadOnly,
         permissions.DjangoModelPermissionsOrAnonReadOnly,
@@ -137,6 +218,7 @@ class RecipeRevisionViewSet(viewsets.ReadOnlyModelViewSet):
 class ApprovalRequestViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = ApprovalRequest.objects.all()
     serializer_class = ApprovalRequestSerializer
+    pagination_class = CursorPagination
     permission_classes = [
         AdminEnabledOrReadOnly,
         permissions.DjangoModelPermissionsOrAnonReadOnly,
@@ -10,5 +10,9 @@ class RecipesApp(AppConfig):
     verbose_name = 'Normandy Recipes'
 
     def ready(self):
+        # Don't import models when module loads due to app startup.
+        from normandy.recipes import signals
+
         checks.register()
+        signals.register()
         load_geoip_database()
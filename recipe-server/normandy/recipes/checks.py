@@ -37,20 +37,14 @@ def recipe_signatures_are_correct(app_configs, **kwargs):
     errors = []
     try:
         Recipe = apps.get_model('recipes', 'Recipe')
-        signed_recipes = list(Recipe.objects.exclude(signature=None))
+        report = Recipe.objects.verify_signatures()
     except (ProgrammingError, OperationalError, ImproperlyConfigured):
         errors.append(Info('Could not retrieve recipes', id=INFO_COULD_NOT_RETRIEVE_RECIPES))
     else:
-        for recipe in signed_recipes:
-            data = recipe.canonical_json()
-            signature = recipe.signature.signature
-            pubkey = recipe.signature.public_key
-            try:
-                signing.verify_signature(data, signature, pubkey)
-            except signing.BadSignature as e:
-                msg = ("Recipe '{recipe}' (id={recipe.id}) has a bad signature: {detail}"
-                       .format(recipe=recipe, detail=e.detail))
-                errors.append(Warning(msg, id=WARNING_INVALID_RECIPE_SIGNATURE))
+        for recipe in report['invalid_recipes']:
+            msg = ("Recipe '{recipe[name]}' (id={recipe[id]}) has a bad signature: "
+                   "{recipe[error]}".format(recipe=recipe))
+            errors.append(Warning(msg, id=WARNING_INVALID_RECIPE_SIGNATURE))
 
     return errors
 
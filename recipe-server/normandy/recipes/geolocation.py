@@ -1,11 +1,20 @@
 import logging
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from datetime import datetime
 
 from django.conf import settings
 
+import maxminddb
 from geoip2.database import Reader
 from geoip2.errors import GeoIP2Error, AddressNotFoundError
+from maxminddb import InvalidDatabaseError, MODE_MMAP, MODE_MMAP_EXT
+from statsd.defaults.django import statsd
 
 
+INFO_RELOADING_DATABASE = 'normandy.geolocation.I001'
 WARNING_CANNOT_LOAD_DATABASE = 'normandy.geolocation.W001'
 WARNING_UNKNOWN_GEOIP_ERROR = 'normandy.geolocation.W002'
 
@@ -13,30 +22,155 @@ WARNING_UNKNOWN_GEOIP_ERROR = 'normandy.geolocation.W002'
 logger = logging.getLogger(__name__)
 
 
-#: Shared instance of the GeoIP2 database reader.
-geoip_reader = None
+#: A GeoIP2 database reader, the cache of lookups made with it and the
+#: modification time of the file it was loaded from. They are replaced
+#: together, so a lookup never uses one reader's cache with another.
+GeoIPDatabase = namedtuple('GeoIPDatabase', ['reader', 'country_cache', 'mtime'])
+
+#: The shared, currently loaded database.
+geoip_database = GeoIPDatabase(reader=None, country_cache=None, mtime=None)
+
+_next_reload_check = 0
+_reload_lock = threading.Lock()
+
+#: Memory-map the database, using the C extension if it is installed.
+READER_MODE = MODE_MMAP_EXT if maxminddb.extension else MODE_MMAP
+
+
+class CountryCache(object):
+    """
+    A size-bounded cache of country codes by IP address. The least
+    recently used entries are evicted first, and entries expire after
+    `ttl` seconds.
+    """
+    MISSING = object()
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, ip_address):
+        """Return the cached country code, or `CountryCache.MISSING`."""
+        with self._lock:
+            entry = self._entries.get(ip_address)
+            if entry is None:
+                return self.MISSING
+
+            expires, country_code = entry
+            if expires < time.monotonic():
+                del self._entries[ip_address]
+                return self.MISSING
+
+            self._entries.move_to_end(ip_address)
+            return country_code
+
+    def set(self, ip_address, country_code):
+        with self._lock:
+            self._entries[ip_address] = (time.monotonic() + self.ttl, country_code)
+            self._entries.move_to_end(ip_address)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
 
 
 def load_geoip_database():
-    global geoip_reader
+    global geoip_database
 
+    reader, mtime = geoip_database.reader, geoip_database.mtime
     try:
-        geoip_reader = Reader(settings.GEOIP2_DATABASE)
-    except IOError:
+        # Read the mtime first, so that changes made while opening the
+        # database are picked up by the next reload.
+        new_mtime = os.stat(settings.GEOIP2_DATABASE).st_mtime
+        new_reader = Reader(settings.GEOIP2_DATABASE, mode=READER_MODE)
+    except (IOError, InvalidDatabaseError):
         logger.warning(
             'Geolocation is disabled: Cannot load database.',
             extra={'code': WARNING_CANNOT_LOAD_DATABASE}
         )
+    else:
+        # Lookups in progress hold their own reference to the old reader,
+        # so it is replaced rather than closed.
+        reader, mtime = new_reader, new_mtime
+
+    # Lookups from a previous database may be out of date.
+    country_cache = CountryCache(settings.GEOIP2_CACHE_SIZE, settings.GEOIP2_CACHE_TTL)
+    geoip_database = GeoIPDatabase(reader=reader, country_cache=country_cache, mtime=mtime)
+
+
+def reload_geoip_database_if_changed():
+    """
+    Reload the database if its file has been modified since it was
+    loaded.
+
+    The file is checked at most once every `GEOIP2_RELOAD_INTERVAL`
+    seconds, by one thread at a time. Other threads carry on using the
+    current reader rather than waiting.
+    """
+    global _next_reload_check
+
+    interval = settings.GEOIP2_RELOAD_INTERVAL
+    if not interval or time.monotonic() < _next_reload_check:
+        return
+
+    if not _reload_lock.acquire(blocking=False):
+        return
+
+    try:
+        if time.monotonic() < _next_reload_check:
+            return
+        _next_reload_check = time.monotonic() + interval
+
+        try:
+            mtime = os.stat(settings.GEOIP2_DATABASE).st_mtime
+        except OSError:
+            return
+
+        if mtime != geoip_database.mtime:
+            logger.info(
+                'Reloading the geolocation database.',
+                extra={'code': INFO_RELOADING_DATABASE}
+            )
+            load_geoip_database()
+    finally:
+        _reload_lock.release()
+
+
+def get_database_build_time():
+    """Return when the loaded database was built, or None if there isn't one."""
+    reader = geoip_database.reader
+    if reader is None:
+        return None
+    return datetime.utcfromtimestamp(reader.metadata().build_epoch)
 
 
 def get_country_code(ip_address):
-    if geoip_reader and ip_address:
+    reload_geoip_database_if_changed()
+
+    database = geoip_database
+    reader, cache = database.reader, database.country_cache
+
+    if reader and ip_address:
+        if cache is not None:
+            country_code = cache.get(ip_address)
+            if country_code is not CountryCache.MISSING:
+                statsd.incr('geolocation.cache.hit')
+                return country_code
+            statsd.incr('geolocation.cache.miss')
+
         try:
-            return geoip_reader.country(ip_address).country.iso_code
+            country_code = reader.country(ip_address).country.iso_code
         except AddressNotFoundError:
-            pass
+            country_code = None
         except GeoIP2Error as exc:
             logger.warning(exc, extra={'code': WARNING_UNKNOWN_GEOIP_ERROR})
-            pass
+            return None
+
+        if cache is not None:
+            cache.set(ip_address, country_code)
+        return country_code
 
     return None
@@ -0,0 +1,33 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from normandy.recipes.models import Recipe
+from normandy.recipes.targeting import estimate_reach, generate_client_contexts
+
+
+class Command(BaseCommand):
+    """
+    Evaluate the filter expressions of enabled Recipes against a sample of
+    synthetic clients, and print a JSON report of how many each matched.
+    """
+    help = 'Estimate the share of clients matched by enabled Recipes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sample-size',
+            type=int,
+            default=settings.TARGETING_ESTIMATE_SAMPLE_SIZE,
+            help='Number of synthetic clients to evaluate recipes against'
+        )
+        parser.add_argument(
+            '--seed',
+            help='Seed for generating clients, to make estimates repeatable'
+        )
+
+    def handle(self, *args, sample_size, seed=None, **options):
+        recipes = Recipe.objects.filter(enabled=True).for_serialization().order_by('id')
+        contexts = generate_client_contexts(sample_size, seed=seed)
+        report = estimate_reach(recipes, contexts)
+        self.stdout.write(json.dumps(report, indent=2, sort_keys=True))
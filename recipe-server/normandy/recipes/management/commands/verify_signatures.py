@@ -0,0 +1,36 @@
+import json
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from normandy.recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    """
+    Verify the signatures of all signed Recipes, and print a JSON report of
+    any that are invalid.
+    """
+    help = 'Verify Recipe signatures'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--enabled',
+            action='store_true',
+            help='Only verify signatures for enabled recipes'
+        )
+        parser.add_argument(
+            '--processes',
+            type=int,
+            default=settings.SIGNATURE_VERIFICATION_PROCESSES or os.cpu_count() or 1,
+            help='Number of processes to verify signatures with'
+        )
+
+    def handle(self, *args, enabled=False, processes=1, **options):
+        recipes = Recipe.objects.all()
+        if enabled:
+            recipes = recipes.filter(enabled=True)
+
+        report = recipes.verify_signatures(processes=processes)
+        self.stdout.write(json.dumps(report, indent=2, sort_keys=True))
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+def build_filter_expression(revision):
+    parts = []
+
+    locales = revision.locales.order_by('name')
+    if locales:
+        parts.append('normandy.locale in [{}]'.format(
+            ', '.join(["'{}'".format(locale.code) for locale in locales])))
+
+    countries = revision.countries.order_by('name')
+    if countries:
+        parts.append('normandy.country in [{}]'.format(
+            ', '.join(["'{}'".format(c.code) for c in countries])))
+
+    channels = revision.channels.order_by('slug')
+    if channels:
+        parts.append('normandy.channel in [{}]'.format(
+            ', '.join(["'{}'".format(c.slug) for c in channels])))
+
+    if revision.extra_filter_expression:
+        parts.append(revision.extra_filter_expression)
+
+    expression = ') && ('.join(parts)
+
+    return '({})'.format(expression) if len(parts) > 1 else expression
+
+
+def store_filter_expressions(apps, schema_editor):
+    RecipeRevision = apps.get_model('recipes', 'RecipeRevision')
+
+    for revision in RecipeRevision.objects.all():
+        revision.filter_expression = build_filter_expression(revision)
+        revision.save(update_fields=['filter_expression'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0042_remove_invalid_signatures'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reciperevision',
+            name='filter_expression',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.RunPython(store_filter_expressions, migrations.RunPython.noop),
+    ]
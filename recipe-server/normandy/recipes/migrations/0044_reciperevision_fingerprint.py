@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import hashlib
+import json
+
+from django.db import migrations, models
+
+
+def build_fingerprint(revision):
+    content = {
+        'name': revision.name,
+        'action': revision.action_id,
+        'arguments': json.loads(revision.arguments_json),
+        'extra_filter_expression': revision.extra_filter_expression,
+        'channels': sorted(c.slug for c in revision.channels.all()),
+        'countries': sorted(c.code for c in revision.countries.all()),
+        'locales': sorted(locale.code for locale in revision.locales.all()),
+    }
+    content_json = json.dumps(content, ensure_ascii=True, separators=(',', ':'), sort_keys=True)
+    return hashlib.sha256(content_json.encode()).hexdigest()
+
+
+def store_fingerprints(apps, schema_editor):
+    RecipeRevision = apps.get_model('recipes', 'RecipeRevision')
+
+    revisions = RecipeRevision.objects.prefetch_related('channels', 'countries', 'locales')
+    for revision in revisions:
+        revision.fingerprint = build_fingerprint(revision)
+        revision.save(update_fields=['fingerprint'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0043_reciperevision_filter_expression'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reciperevision',
+            name='fingerprint',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=64),
+        ),
+        migrations.RunPython(store_fingerprints, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import json
+import logging
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+logger = logging.getLogger(__name__)
+
+
+def store_experiment_slugs(apps, schema_editor):
+    Recipe = apps.get_model('recipes', 'Recipe')
+    ExperimentSlug = apps.get_model('recipes', 'ExperimentSlug')
+
+    recipes = (
+        Recipe.objects
+        .filter(latest_revision__action__name='preference-experiment')
+        .select_related('latest_revision')
+        .order_by('id')
+    )
+    recipe_ids_by_slug = {}
+    for recipe in recipes:
+        slug = json.loads(recipe.latest_revision.arguments_json).get('slug')
+        if slug is not None:
+            recipe_ids_by_slug.setdefault(slug, []).append(recipe.id)
+
+    # Slugs are validated to be unique, but older data may not be. The oldest
+    # recipe using a slug keeps it. The others are left without a stored
+    # slug, so they can't be revised until they are given a new one.
+    for slug, recipe_ids in sorted(recipe_ids_by_slug.items()):
+        if len(recipe_ids) > 1:
+            logger.warning(
+                'Experiment slug {} is used by more than one recipe. Recipe pk {} keeps it, and '
+                'recipe pks {} must be given a new slug.'.format(
+                    slug, recipe_ids[0], ', '.join(str(pk) for pk in recipe_ids[1:])))
+
+    ExperimentSlug.objects.bulk_create([
+        ExperimentSlug(recipe_id=recipe_ids[0], slug=slug)
+        for slug, recipe_ids in recipe_ids_by_slug.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0044_reciperevision_fingerprint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExperimentSlug',
+            fields=[
+                ('recipe', models.OneToOneField(
+                    on_delete=django.db.models.deletion.CASCADE, primary_key=True,
+                    related_name='experiment_slug', serialize=False, to='recipes.Recipe')),
+                ('slug', models.CharField(max_length=255, unique=True)),
+            ],
+        ),
+        migrations.RunPython(store_experiment_slugs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0045_experimentslug'),
+    ]
+
+    operations = [
+        migrations.AlterIndexTogether(
+            name='reciperevision',
+            index_together=set([('created', 'id')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='approvalrequest',
+            index_together=set([('created', 'id')]),
+        ),
+    ]
@@ -1,12 +1,15 @@
 import hashlib
 import json
 import logging
+import time
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from django.conf import settings
 from django.contrib.auth.models import User
 from django.core.exceptions import ImproperlyConfigured, ValidationError
-from django.db import models, transaction
+from django.db import IntegrityError, models, transaction
+from django.db.models import Case, Value, When
 from django.utils import timezone
 from django.utils.functional import cached_property
 
@@ -16,17 +19,23 @@ from rest_framework.reverse import reverse
 from reversion import revisions as reversion
 
 from normandy.base.api.renderers import CanonicalJSONRenderer
-from normandy.base.utils import filter_m2m, get_client_ip
+from normandy.base.utils import canonical_json_dumps, get_client_ip
 from normandy.recipes.decorators import current_revision_property
 from normandy.recipes.geolocation import get_country_code
-from normandy.recipes.signing import Autographer
+from normandy.recipes.signing import Autographer, verify_signatures
 from normandy.recipes.validators import validate_json
 
 
 INFO_REQUESTING_RECIPE_SIGNATURES = 'normandy.recipes.I001'
 INFO_CREATE_REVISION = 'normandy.recipes.I002'
+INFO_UPDATED_RECIPE_SIGNATURES = 'normandy.recipes.I003'
+INFO_VERIFIED_RECIPE_SIGNATURES = 'normandy.recipes.I004'
 WARNING_BYPASSING_PEER_APPROVAL = 'normandy.recipes.W001'
 
+#: Included in `RecipeQuerySet.signed_version`. Increment it whenever the
+#: serialized form of signed recipes changes without their data changing.
+SIGNED_RECIPES_SERIALIZATION_VERSION = 1
+
 
 logger = logging.getLogger(__name__)
 
@@ -72,12 +81,70 @@ class Signature(models.Model):
 
 
 class RecipeQuerySet(models.QuerySet):
+    def for_serialization(self, fields=None):
+        """
+        Fetch the revisions, actions, approval requests and targeting of
+        the recipes in the queryset up front, so that serializing them
+        takes a fixed number of queries instead of several per recipe.
+
+        If `fields` is given, only the related objects needed to serialize
+        those fields of a recipe are fetched.
+        """
+        def wanted(*names):
+            return fields is None or any(name in fields for name in names)
+
+        related = ['latest_revision', 'approved_revision']
+        prefetched = []
+        for revision in ['latest_revision', 'approved_revision']:
+            # Nested revisions are serialized with their own copy of the
+            # recipe, which needs all of the revision's related objects.
+            nested = wanted(revision)
+            if nested or wanted('action'):
+                related.append(f'{revision}__action')
+            if nested or (revision == 'latest_revision' and wanted('approval_request')):
+                related += [
+                    f'{revision}__approval_request__approver',
+                    f'{revision}__approval_request__creator',
+                ]
+            for targeting in ['channels', 'countries', 'locales']:
+                if nested or wanted(targeting):
+                    prefetched.append(f'{revision}__{targeting}')
+            if nested:
+                prefetched.append(f'{revision}__recipe')
+        return self.select_related('signature', *related).prefetch_related(*prefetched)
+
+    def signed_version(self):
+        """
+        Return a digest identifying the current state of the signed recipes
+        in the queryset.
+
+        Any change to a recipe's content, approval or enabled state
+        re-signs it, so the digest changes whenever the serialized signed
+        recipes would, as long as the way they are serialized stays the
+        same. It only reads columns from the recipe and signature tables,
+        which makes it much cheaper than serializing.
+        """
+        rows = self.prefetch_related(None).exclude(signature=None).values_list(
+            'id', 'enabled', 'latest_revision_id', 'approved_revision_id', 'signature_id',
+            'signature__signature')
+        hasher = hashlib.sha256()
+        hasher.update(f'{SIGNED_RECIPES_SERIALIZATION_VERSION}\n'.encode())
+        hasher.update(str(settings.AUTOGRAPH_X5U_CACHE_BUST).encode())
+        for row in rows:
+            hasher.update(repr(row).encode())
+        return hasher.hexdigest()
+
     def update_signatures(self):
         """
         Update the signatures on all Recipes in the queryset.
+
+        Recipes are sent to Autograph in chunks, several of which are
+        signed at once. The signatures for each chunk are saved in their
+        own transaction as soon as they arrive, so a failure part way
+        through keeps the chunks that were already signed.
         """
         # Convert to a list because order must be preserved
-        recipes = list(self)
+        recipes = list(self.select_related('latest_revision__action', 'approved_revision__action'))
 
         try:
             autographer = Autographer()
@@ -93,14 +160,97 @@ class RecipeQuerySet(models.QuerySet):
             extra={'code': INFO_REQUESTING_RECIPE_SIGNATURES, 'recipe_ids': recipe_ids}
         )
 
-        canonical_jsons = [r.canonical_json() for r in recipes]
-        signatures_data = autographer.sign_data(canonical_jsons)
+        start_time = time.monotonic()
+        chunk_size = settings.AUTOGRAPH_SIGNING_CHUNK_SIZE
+        chunks = [recipes[i:i + chunk_size] for i in range(0, len(recipes), chunk_size)]
+
+        with ThreadPoolExecutor(max_workers=settings.AUTOGRAPH_SIGNING_CONCURRENCY) as executor:
+            # Serialize in this thread, since it may need the database.
+            futures = {
+                executor.submit(autographer.sign_data, [r.canonical_json() for r in chunk]): chunk
+                for chunk in chunks
+            }
+            try:
+                for future in as_completed(futures):
+                    self._save_signatures(futures[future], future.result())
+            except Exception:
+                for future in futures:
+                    future.cancel()
+                raise
+
+        duration = time.monotonic() - start_time
+        rate = len(recipes) / duration if duration else 0
+        logger.info(
+            f'Signed {len(recipes)} recipes in {duration:.2f} seconds ({rate:.1f} per second)',
+            extra={
+                'code': INFO_UPDATED_RECIPE_SIGNATURES,
+                'recipe_count': len(recipes),
+                'chunk_count': len(chunks),
+                'duration': duration,
+            }
+        )
 
-        for recipe, sig_data in zip(recipes, signatures_data):
-            signature = Signature(**sig_data)
-            signature.save()
+    def verify_signatures(self, processes=1):
+        """
+        Verify the signatures of all signed Recipes in the queryset, and
+        return a report of the results that can be rendered as JSON.
+        See `signing.verify_signatures` for `processes`.
+        """
+        recipes = list(
+            self.exclude(signature=None)
+            .prefetch_related(None)
+            .select_related('signature', 'latest_revision__action', 'approved_revision__action')
+            .order_by('id')
+        )
+
+        start_time = time.monotonic()
+        # Serialize in this process, since it needs the database.
+        errors = verify_signatures([
+            (r.canonical_json(), r.signature.signature, r.signature.public_key)
+            for r in recipes
+        ], processes=processes)
+        duration = time.monotonic() - start_time
+
+        invalid_recipes = [
+            {'id': recipe.id, 'name': recipe.name, 'error': error.detail}
+            for recipe, error in zip(recipes, errors)
+            if error is not None
+        ]
+        logger.info(
+            f'Verified {len(recipes)} recipe signatures in {duration:.2f} seconds, '
+            f'{len(invalid_recipes)} invalid',
+            extra={
+                'code': INFO_VERIFIED_RECIPE_SIGNATURES,
+                'recipe_count': len(recipes),
+                'invalid_count': len(invalid_recipes),
+                'duration': duration,
+            }
+        )
+
+        return {
+            'recipe_count': len(recipes),
+            'valid_count': len(recipes) - len(invalid_recipes),
+            'invalid_count': len(invalid_recipes),
+            'invalid_recipes': invalid_recipes,
+            'duration': duration,
+        }
+
+    @staticmethod
+    @transaction.atomic
+    def _save_signatures(recipes, signatures_data):
+        signatures = Signature.objects.bulk_create(
+            [Signature(**sig_data) for sig_data in signatures_data])
+
+        # Only the signature is changing, so Recipe.save would have nothing
+        # else to do and the recipes can all be updated in a single query.
+        Recipe.objects.filter(id__in=[r.id for r in recipes]).update(signature=Case(
+            *[When(id=recipe.id, then=Value(signature.id))
+              for recipe, signature in zip(recipes, signatures)],
+            output_field=models.IntegerField(),
+        ))
+
+        for recipe, signature in zip(recipes, signatures):
             recipe.signature = signature
-            recipe.save()
 
 
 class Recipe(DirtyFieldsMixin, models.Model):
@@ -218,29 +368,23 @@ class Recipe(DirtyFieldsMixin, models.Model):
             data['arguments_json'] = json.dumps(data.pop('arguments'))
 
         if revision:
-            revisions = RecipeRevision.objects.filter(id=revision.id)
-
-            revision_data = revision.data
-            revision_data.update(data)
+            data = dict(revision.content_data, **data)
 
-            channels = revision_data.pop('channels')
-            revisions = filter_m2m(revisions, 'channels', channels)
+        # Only targeting that isn't being replaced is read from the current
+        # revision, so that unchanged revisions are usually found by
+        # fingerprint without querying any relations.
+        def pop_targeting(field):
+            if field in data:
+                return data.pop(field)
+            return list(getattr(revision, field).all()) if revision else []
 
-            countries = revision_data.pop('countries')
-            revisions = filter_m2m(revisions, 'countries', countries)
+        channels = pop_targeting('channels')
+        countries = pop_targeting('countries')
+        locales = pop_targeting('locales')
 
-            locales = revision_data.pop('locales')
-            revisions = filter_m2m(revisions, 'locales', locales)
-
-            data = revision_data
-            revisions = revisions.filter(**data)
-
-            is_clean = revisions.exists()
-        else:
-            channels = data.pop('channels', [])
-            countries = data.pop('countries', [])
-            locales = data.pop('locales', [])
-            is_clean = False
+        fingerprint = RecipeRevision.build_fingerprint(
+            data, channels=channels, countries=countries, locales=locales)
+        is_clean = revision is not None and fingerprint == revision.fingerprint
 
         if not is_clean or force:
             logger.info(
@@ -251,17 +395,18 @@ class Recipe(DirtyFieldsMixin, models.Model):
             if revision and revision.approval_status == RecipeRevision.PENDING:
                 revision.approval_request.delete()
 
+            filter_expression = RecipeRevision.build_filter_expression(
+                data.get('extra_filter_expression', ''), channels=channels, countries=countries,
+                locales=locales)
             self.latest_revision = RecipeRevision.objects.create(
-                recipe=self, parent=revision, **data)
-
-            for channel in channels:
-                self.latest_revision.channels.add(channel)
+                recipe=self, parent=revision, filter_expression=filter_expression,
+                fingerprint=fingerprint, **data)
 
-            for country in countries:
-                self.latest_revision.countries.add(country)
-
-            for locale in locales:
-                self.latest_revision.locales.add(locale)
+            # Add each set of relations at once, so that it is written with a
+            # single bulk insert.
+            self.latest_revision.channels.add(*channels)
+            self.latest_revision.countries.add(*countries)
+            self.latest_revision.locales.add(*locales)
 
             self.save()
 
@@ -294,11 +439,27 @@ class Recipe(DirtyFieldsMixin, models.Model):
         super().save(*args, **kwargs)
 
 
+class RecipeRevisionQuerySet(models.QuerySet):
+    def for_serialization(self):
+        """
+        Fetch the recipe, action, approval request and targeting of the
+        revisions in the queryset up front, so that serializing them takes
+        a fixed number of queries instead of several per revision.
+        """
+        return (
+            self.select_related(
+                'action', 'approval_request__approver', 'approval_request__creator', 'recipe')
+            .prefetch_related('channels', 'countries', 'locales')
+        )
+
+
 class RecipeRevision(models.Model):
     APPROVED = 'approved'
     REJECTED = 'rejected'
     PENDING = 'pending'
 
+    objects = RecipeRevisionQuerySet.as_manager()
+
     id = models.CharField(max_length=64, primary_key=True)
     parent = models.OneToOneField('self', null=True, on_delete=models.CASCADE,
                                   related_name='child')
@@ -313,48 +474,87 @@ class RecipeRevision(models.Model):
     action = models.ForeignKey('Action', related_name='recipe_revisions')
     arguments_json = models.TextField(default='{}', validators=[validate_json])
     extra_filter_expression = models.TextField(blank=False)
+    filter_expression = models.TextField(blank=True, default='')
+    fingerprint = models.CharField(max_length=64, blank=True, default='', db_index=True)
     channels = models.ManyToManyField(Channel)
     countries = models.ManyToManyField(Country)
     locales = models.ManyToManyField(Locale)
 
     class Meta:
         ordering = ('-created',)
+        index_together = [('created', 'id')]
 
     @property
-    def data(self):
+    def content_data(self):
+        """The fields in `data` that are stored on the revision itself."""
         return {
             'name': self.name,
             'action': self.action,
             'arguments_json': self.arguments_json,
             'extra_filter_expression': self.extra_filter_expression,
-            'channels': list(self.channels.all()),
-            'countries': list(self.countries.all()),
-            'locales': list(self.locales.all()),
         }
 
     @property
-    def filter_expression(self):
+    def data(self):
+        return dict(
+            self.content_data,
+            channels=list(self.channels.all()),
+            countries=list(self.countries.all()),
+            locales=list(self.locales.all()),
+        )
+
+    @staticmethod
+    def build_filter_expression(extra_filter_expression, channels=(), countries=(), locales=()):
+        """
+        Build the full filter expression for a revision from its targeting.
+
+        Revisions never change after they are created, so this is done once
+        when creating a revision and the result stored with it.
+        """
         parts = []
 
-        if self.locales.count():
-            locales = ', '.join(["'{}'".format(l.code) for l in self.locales.all()])
-            parts.append('normandy.locale in [{}]'.format(locales))
+        if locales:
+            locales = sorted(locales, key=lambda locale: locale.name)
+            parts.append('normandy.locale in [{}]'.format(
+                ', '.join(["'{}'".format(locale.code) for locale in locales])))
 
-        if self.countries.count():
-            countries = ', '.join(["'{}'".format(c.code) for c in self.countries.all()])
-            parts.append('normandy.country in [{}]'.format(countries))
+        if countries:
+            countries = sorted(countries, key=lambda c: c.name)
+            parts.append('normandy.country in [{}]'.format(
+                ', '.join(["'{}'".format(c.code) for c in countries])))
 
-        if self.channels.count():
-            channels = ', '.join(["'{}'".format(c.slug) for c in self.channels.all()])
-            parts.append('normandy.channel in [{}]'.format(channels))
+        if channels:
+            channels = sorted(channels, key=lambda c: c.slug)
+            parts.append('normandy.channel in [{}]'.format(
+                ', '.join(["'{}'".format(c.slug) for c in channels])))
 
-        if self.extra_filter_expression:
-            parts.append(self.extra_filter_expression)
+        if extra_filter_expression:
+            parts.append(extra_filter_expression)
 
         expression = ') && ('.join(parts)
 
         return '({})'.format(expression) if len(parts) > 1 else expression
 
+    @staticmethod
+    def build_fingerprint(data, channels=(), countries=(), locales=()):
+        """
+        Build a hash of a revision's content, from the same fields as
+        `data`. Revisions with the same content have the same fingerprint,
+        so a new revision can be compared with the current one without a
+        query.
+        """
+        action = data.get('action')
+        content = {
+            'name': data.get('name', ''),
+            'action': action.id if action else None,
+            'arguments': json.loads(data.get('arguments_json', '{}')),
+            'extra_filter_expression': data.get('extra_filter_expression', ''),
+            'channels': sorted(c.slug for c in channels),
+            'countries': sorted(c.code for c in countries),
+            'locales': sorted(locale.code for locale in locales),
+        }
+        return hashlib.sha256(canonical_json_dumps(content).encode()).hexdigest()
+
     @property
     def arguments(self):
         return json.loads(self.arguments_json)
@@ -388,6 +588,7 @@ class RecipeRevision(models.Model):
                                      self.arguments_json, self.filter_expression)
         return hashlib.sha256(data.encode()).hexdigest()
 
+    @transaction.atomic
     def save(self, *args, **kwargs):
         if self.parent:
             old_arguments = self.parent.arguments
@@ -400,6 +601,28 @@ class RecipeRevision(models.Model):
         self.id = self.hash()
         self.updated = timezone.now()
         super().save(*args, **kwargs)
+        self.update_experiment_slug()
+
+    def update_experiment_slug(self):
+        """
+        Record the experiment slug of this revision as the one in use by
+        its recipe, or remove the recipe's slug if this revision is not an
+        experiment.
+
+        Raises `ValidationError` if another recipe is using the slug.
+        `validate_arguments` normally catches this first, but it allows
+        unchanged slugs and can race with other revisions.
+        """
+        if self.action.name == 'preference-experiment':
+            try:
+                with transaction.atomic():
+                    ExperimentSlug.objects.update_or_create(
+                        recipe=self.recipe, defaults={'slug': self.arguments['slug']})
+            except IntegrityError:
+                msg = self.action.errors['duplicate_experiment_slug']
+                raise serializers.ValidationError({'arguments': {'slug': msg}})
+        else:
+            ExperimentSlug.objects.filter(recipe=self.recipe).delete()
 
     def request_approval(self, creator):
         approval_request = ApprovalRequest(revision=self, creator=creator)
@@ -409,6 +632,17 @@ class RecipeRevision(models.Model):
         return approval_request
 
 
+class ExperimentSlug(models.Model):
+    """
+    The experiment slug used by each recipe whose latest revision is a
+    preference experiment, so that slugs can be checked for uniqueness
+    without loading every experiment.
+    """
+    recipe = models.OneToOneField(Recipe, primary_key=True, on_delete=models.CASCADE,
+                                  related_name='experiment_slug')
+    slug = models.CharField(max_length=255, unique=True)
+
+
 class ApprovalRequest(models.Model):
     revision = models.OneToOneField(RecipeRevision, related_name='approval_request')
     created = models.DateTimeField(default=timezone.now)
@@ -419,6 +653,9 @@ class ApprovalRequest(models.Model):
                                  null=True)
     comment = models.TextField(null=True)
 
+    class Meta:
+        index_together = [('created', 'id')]
+
     class NotActionable(Exception):
         pass
 
@@ -562,13 +799,9 @@ class Action(models.Model):
                 branch_slugs.add(branch['slug'])
                 branch_values.add(branch['value'])
 
-            # Experiment slugs should be unique.
-            experiment_recipes = Recipe.objects.filter(latest_revision__action=self)
-            existing_slugs = set(r.arguments['slug'] for r in experiment_recipes)
-            if old_arguments:
-                # It is ok if the slug did not change
-                existing_slugs.remove(old_arguments['slug'])
-            if arguments['slug'] in existing_slugs:
+            # Experiment slugs should be unique. It is ok if the slug did not change.
+            slug_changed = not old_arguments or arguments['slug'] != old_arguments.get('slug')
+            if slug_changed and ExperimentSlug.objects.filter(slug=arguments['slug']).exists():
                 msg = self.errors['duplicate_experiment_slug']
                 errors['slug'] = msg
 
@@ -577,6 +810,31 @@ class Action(models.Model):
                 raise serializers.ValidationError({'arguments': errors})
 
 
+class RecipeListVersion(models.Model):
+    """
+    A counter that is bumped whenever recipes, or anything listed with
+    them, change. It is kept in a single row so that every process sees
+    the same version, and only changes when the bumping transaction
+    commits.
+    """
+    ROW_ID = 1
+
+    version = models.PositiveIntegerField(default=0)
+
+    @classmethod
+    def get(cls):
+        version = cls.objects.filter(id=cls.ROW_ID).values_list('version', flat=True).first()
+        return version or 0
+
+    @classmethod
+    def bump(cls):
+        bumped = cls.objects.filter(id=cls.ROW_ID).update(version=models.F('version') + 1)
+        if not bumped:
+            _, created = cls.objects.get_or_create(id=cls.ROW_ID, defaults={'version': 1})
+            if not created:
+                cls.bump()
+
+
 class Client(object):
     """A client attempting to fetch a set of recipes."""
 
@@ -0,0 +1,47 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+from normandy.recipes.models import (
+    Action,
+    ApprovalRequest,
+    Channel,
+    Country,
+    Locale,
+    Recipe,
+    RecipeListVersion,
+    RecipeRevision,
+)
+
+
+#: Models that are listed with recipes, directly or through relations.
+RECIPE_LIST_MODELS = [
+    Action,
+    ApprovalRequest,
+    Channel,
+    Country,
+    Locale,
+    Recipe,
+    RecipeRevision,
+    User,
+]
+
+
+def bump_recipe_list_version(sender, update_fields=None, **kwargs):
+    # Logging in only changes `last_login`, which is never listed.
+    if update_fields is not None and set(update_fields) == {'last_login'}:
+        return
+    RecipeListVersion.bump()
+
+
+def bump_recipe_list_version_for_m2m(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        RecipeListVersion.bump()
+
+
+def register():
+    for model in RECIPE_LIST_MODELS:
+        post_save.connect(bump_recipe_list_version, sender=model)
+        post_delete.connect(bump_recipe_list_version, sender=model)
+
+    for field in [RecipeRevision.channels, RecipeRevision.countries, RecipeRevision.locales]:
+        m2m_changed.connect(bump_recipe_list_version_for_m2m, sender=field.through)
@@ -2,7 +2,12 @@ import base64
 import binascii
 import hashlib
 import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from functools import lru_cache
 
 import ecdsa
 import requests
@@ -12,12 +17,14 @@ from pyasn1_modules import rfc5280
 from requests_hawk import HawkAuth
 
 from django.conf import settings
+from django.core.cache import cache
 from django.core.exceptions import ImproperlyConfigured
 from django.utils import timezone
 from django.utils.functional import cached_property
 
 
 INFO_RECEIVED_SIGNATURES = 'normandy.autograph.I001'
+WARNING_RETRYING_SIGNING = 'normandy.autograph.W001'
 
 
 logger = logging.getLogger(__name__)
@@ -41,6 +48,11 @@ class Autographer(object):
         session.auth = HawkAuth(
             id=str(settings.AUTOGRAPH_HAWK_ID),
             key=str(settings.AUTOGRAPH_HAWK_SECRET_KEY))
+        # Keep enough connections open for concurrent signing requests.
+        adapter = requests.adapters.HTTPAdapter(
+            pool_maxsize=settings.AUTOGRAPH_SIGNING_CONCURRENCY)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
         return session
 
     def check_config(self):
@@ -67,8 +79,7 @@ class Autographer(object):
                 'input': encoded_implementation,
             })
 
-        res = self.session.post(url, json=signing_request)
-        res.raise_for_status()
+        res = self.post(url, signing_request)
         signing_responses = res.json()
 
         logger.info(
@@ -87,6 +98,33 @@ class Autographer(object):
             })
         return signatures
 
+    def post(self, url, data):
+        """
+        POST `data` to Autograph as JSON, retrying with an exponential
+        backoff if Autograph can't be reached or returns a server error.
+
+        Retries are made here rather than by the connection pool so that
+        each attempt is signed with a fresh Hawk nonce.
+        """
+        retries = settings.AUTOGRAPH_SIGNING_RETRIES
+        for attempt in range(retries + 1):
+            try:
+                res = self.session.post(url, json=data)
+                res.raise_for_status()
+                return res
+            except (requests.ConnectionError, requests.Timeout, requests.HTTPError) as err:
+                response = getattr(err, 'response', None)
+                retryable = response is None or response.status_code >= 500
+                if not retryable or attempt == retries:
+                    raise
+
+                delay = settings.AUTOGRAPH_SIGNING_RETRY_BACKOFF * 2 ** attempt
+                logger.warning(
+                    f'Request to Autograph failed ({err}), retrying in {delay} seconds',
+                    extra={'code': WARNING_RETRYING_SIGNING}
+                )
+                time.sleep(delay)
+
 
 def verify_signature(data, signature, pubkey):
     """
@@ -101,15 +139,7 @@ def verify_signature(data, signature, pubkey):
     # Add data template
     data = b'Content-Signature:\x00' + data
 
-    try:
-        verifying_pubkey = ecdsa.VerifyingKey.from_pem(pubkey)
-    except binascii.Error as e:
-        if e.args == ('Incorrect padding',):
-            raise WrongPublicKeySize()
-        else:
-            raise
-    except IndexError as e:
-        raise WrongPublicKeySize()
+    verifying_pubkey = get_verifying_key(pubkey)
 
     try:
         signature = base64.urlsafe_b64decode(signature)
@@ -144,6 +174,52 @@ def verify_signature(data, signature, pubkey):
     return True
 
 
+@lru_cache(maxsize=32)
+def get_verifying_key(pubkey):
+    """
+    Parse a PEM public key. Keys are cached, since every recipe is signed
+    with one of only a few keys.
+    """
+    try:
+        return ecdsa.VerifyingKey.from_pem(pubkey)
+    except binascii.Error as e:
+        if e.args == ('Incorrect padding',):
+            raise WrongPublicKeySize()
+        else:
+            raise
+    except IndexError:
+        raise WrongPublicKeySize()
+
+
+def verify_signatures(items, processes=1):
+    """
+    Verify many signatures at once. If `processes` is more than 1, the
+    signatures are verified in a pool of that many processes. Starting a
+    pool is only worth it for large batches, and shouldn't be done while
+    handling a web request. Only the ``verify_signatures`` management
+    command uses a pool; the API and system checks verify in-process.
+
+    `items` is a list of `(data, signature, pubkey)` tuples. Returns a list
+    in the same order, holding None for each valid signature, or the
+    `BadSignature` exception explaining why it is not valid.
+    """
+    if processes <= 1 or len(items) <= 1:
+        return [_verify_signature_item(item) for item in items]
+
+    # Send items in batches to cut down on the overhead of each task.
+    chunksize = max(1, len(items) // (processes * 4))
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        return list(executor.map(_verify_signature_item, items, chunksize=chunksize))
+
+
+def _verify_signature_item(item):
+    try:
+        verify_signature(*item)
+    except BadSignature as exc:
+        return exc
+    return None
+
+
 class BadSignature(Exception):
     detail = 'Unknown signature problem'
 
@@ -160,23 +236,126 @@ class WrongPublicKeySize(BadSignature):
     detail = 'Public Key is not the right number of bytes'
 
 
-def verify_x5u(url, expire_early=None):
+class CertificateChainCache(object):
     """
-    Verify the certificate chain at a URL.
+    Caches the validity dates of the certificate chains at x5u URLs.
 
-    If the certificates are valid, return True. Otherwise, raise an
-    exception explaining why they are not valid.
+    A chain is reused until the earliest `notAfter` date in it, or for
+    `settings.CERTIFICATES_CACHE_TIME` seconds, whichever comes first.
+    Chains are shared with other processes via the Django cache, under a
+    namespace that `clear` replaces. Concurrent callers for the same URL
+    wait for a single fetch.
+    """
+    #: Number of locks that fetches are spread across, by URL.
+    FETCH_LOCK_COUNT = 16
+
+    def __init__(self):
+        self._chains = {}
+        self._fetch_locks = [threading.Lock() for i in range(self.FETCH_LOCK_COUNT)]
+        self._lock = threading.Lock()
+
+    def get_namespace(self):
+        # If the namespace is evicted, a new one is made, so that chains
+        # cached before a clear are never used again.
+        cache.add('x5u:namespace', uuid.uuid4().hex, None)
+        return cache.get('x5u:namespace', '')
+
+    def cache_key(self, url):
+        return 'x5u:{}:{}'.format(self.get_namespace(), hashlib.sha256(url.encode()).hexdigest())
+
+    def get(self, url):
+        """
+        Return a list of `(not_before, not_after)` tuples for the
+        certificates in the chain at `url`.
+        """
+        validities = self._get_fresh(url)
+        if validities is not None:
+            return validities
+
+        fetch_lock = self._fetch_locks[hash(url) % len(self._fetch_locks)]
+        with fetch_lock:
+            # Another thread may have fetched the chain while we waited.
+            validities = self._get_fresh(url)
+            if validities is not None:
+                return validities
+
+            cache_key = self.cache_key(url)
+            cached = cache.get(cache_key)
+            if cached is not None:
+                expires, validities = cached
+            else:
+                validities = fetch_certificate_validities(url)
+                expires = time.time() + settings.CERTIFICATES_CACHE_TIME
+                if validities:
+                    earliest_not_after = min(not_after for _, not_after in validities)
+                    expires = min(
+                        expires, earliest_not_after.replace(tzinfo=timezone.utc).timestamp())
+                timeout = int(expires - time.time())
+                if timeout > 0:
+                    cache.set(cache_key, (expires, validities), timeout)
+
+            with self._lock:
+                # Drop expired chains, so that URLs no longer in use don't
+                # accumulate.
+                now = time.time()
+                expired_urls = [
+                    chain_url for chain_url, (chain_expires, _) in self._chains.items()
+                    if chain_expires <= now
+                ]
+                for expired_url in expired_urls:
+                    del self._chains[expired_url]
+                self._chains[url] = (expires, validities)
+            return validities
+
+    def _get_fresh(self, url):
+        with self._lock:
+            entry = self._chains.get(url)
+        if entry is not None:
+            expires, validities = entry
+            if time.time() < expires:
+                return validities
+        return None
+
+    def clear(self):
+        """Forget all chains, including those cached by other processes."""
+        with self._lock:
+            self._chains.clear()
+        cache.set('x5u:namespace', uuid.uuid4().hex, None)
+
+
+#: Shared cache of the certificate chains checked by `verify_x5u`.
+certificate_chains = CertificateChainCache()
+
+
+def fetch_certificate_validities(url):
     """
-    req = requests.get(url)
+    Fetch the certificate chain at a URL, and return a list of the
+    `(not_before, not_after)` dates of each certificate in it.
+    """
+    req = requests.get(url, timeout=settings.CERTIFICATES_FETCH_TIMEOUT)
     req.raise_for_status()
     pem = req.content.decode()
     certs = parse_pem_to_certs(pem)
 
+    validities = []
     for cert in certs:
         validity = cert['tbsCertificate']['validity']
         date_format = '%y%m%d%H%M%SZ'
         not_before = datetime.strptime(validity['notBefore']['utcTime'].decode(), date_format)
         not_after = datetime.strptime(validity['notAfter']['utcTime'].decode(), date_format)
+        validities.append((not_before, not_after))
+
+    return validities
+
+
+def verify_x5u(url, expire_early=None):
+    """
+    Verify the certificate chain at a URL.
+
+    If the certificates are valid, return True. Otherwise, raise an
+    exception explaining why they are not valid.
+    """
+    for not_before, not_after in certificate_chains.get(url):
         check_validity(not_before, not_after, expire_early)
 
     return True
@@ -2,6 +2,7 @@ import json
 import logging
 
 from django.db import transaction
+from django.db.models import Case, CharField, Value, When
 
 from product_details.storage import PDDatabaseStorage
 
@@ -21,18 +22,45 @@ class ProductDetailsRelationalStorage(PDDatabaseStorage):
     def update(self, name, content, last_modified):
         logger.info('Updating product_details.', extra={'code': INFO_UPDATE_PRODUCT_DETAILS})
 
-        # Don't import models when module loads due to app startup.
-        from normandy.recipes.models import Locale
-
         super().update(name, content, last_modified)
 
         # If we are updating firefox versions, update the table.
         if name == 'languages.json':
             languages = json.loads(content)
-            for locale_code, names in languages.items():
-                Locale.objects.update_or_create(code=locale_code, defaults={
-                    'name': names['English'],
-                })
+            self.sync_locales({
+                locale_code: names['English'] for locale_code, names in languages.items()
+            })
+
+    def sync_locales(self, locale_names):
+        """
+        Make the locale table match the given dict of locale names keyed
+        by code. The existing locales are diffed against it in memory so
+        that new, renamed and obsolete locales are each written with a
+        single query.
+        """
+        # Don't import models when module loads due to app startup.
+        from normandy.recipes.models import Locale
+
+        existing = dict(Locale.objects.values_list('code', 'name'))
+
+        new_locales = [
+            Locale(code=code, name=name) for code, name in locale_names.items()
+            if code not in existing
+        ]
+        renamed_locales = {
+            code: name for code, name in locale_names.items()
+            if code in existing and existing[code] != name
+        }
+        obsolete_codes = [code for code in existing if code not in locale_names]
+
+        if new_locales:
+            Locale.objects.bulk_create(new_locales)
+
+        if renamed_locales:
+            Locale.objects.filter(code__in=list(renamed_locales)).update(name=Case(
+                *[When(code=code, then=Value(name)) for code, name in renamed_locales.items()],
+                output_field=CharField()
+            ))
 
-            # Remove obsolete locales.
-            Locale.objects.exclude(code__in=languages.keys()).delete()
+        if obsolete_codes:
+            Locale.objects.filter(code__in=obsolete_codes).delete()
@@ -0,0 +1,150 @@
+"""
+Server-side evaluation of filter expressions, used to estimate how many
+clients recipes will match without sending them to clients.
+"""
+import random
+import uuid
+from datetime import datetime, time
+from functools import lru_cache
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from pyjexl import JEXL
+from pyjexl.evaluator import Context, Evaluator
+from pyjexl.exceptions import ParseError
+
+from normandy.recipes.models import Channel, Country, Locale
+from normandy.recipes.utils import deterministic_bucket_sample, deterministic_sample
+
+
+def date(value):
+    """Parse an ISO 8601 date or datetime, like `new Date()` on clients."""
+    parsed = parse_datetime(value)
+    if parsed is None:
+        parsed_date = parse_date(value)
+        if parsed_date is None:
+            return None
+        parsed = datetime.combine(parsed_date, time())
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed, timezone.utc)
+    return parsed
+
+
+def stable_sample(inputs, rate):
+    if not isinstance(inputs, list):
+        inputs = [inputs]
+    return deterministic_sample(rate, inputs)
+
+
+def bucket_sample(inputs, start, count, total):
+    if not isinstance(inputs, list):
+        inputs = [inputs]
+    return deterministic_bucket_sample(start, count, total, inputs)
+
+
+#: Transforms available to filter expressions. Preferences are only known
+#: to clients, so every preference is treated as unset.
+TRANSFORMS = {
+    'date': date,
+    'stableSample': stable_sample,
+    'bucketSample': bucket_sample,
+    'preferenceValue': lambda name, default=None: default,
+    'preferenceIsUserSet': lambda name: False,
+    'preferenceExists': lambda name: False,
+}
+
+
+@lru_cache(maxsize=None)
+def get_jexl():
+    jexl = JEXL()
+    for name, func in TRANSFORMS.items():
+        jexl.add_transform(name, func)
+    return jexl
+
+
+@lru_cache(maxsize=1024)
+def parse_revision_expression(revision_id, filter_expression):
+    """
+    Parse the filter expression of a revision. Revisions never change, so
+    parsed expressions are cached by revision.
+    """
+    return get_jexl().parse(filter_expression)
+
+
+def evaluate(parsed_expression, context):
+    """
+    Return whether a parsed filter expression matches a client context.
+    Clients don't match recipes whose expressions fail to evaluate, so
+    errors are treated as not matching.
+    """
+    try:
+        return bool(Evaluator(get_jexl().config).evaluate(parsed_expression, Context(context)))
+    except Exception:
+        return False
+
+
+def generate_client_contexts(count, seed=None):
+    """
+    Generate contexts for `count` synthetic clients, spread evenly across
+    the known countries, locales and channels.
+    """
+    rng = random.Random(seed)
+    countries = list(Country.objects.values_list('code', flat=True)) or [None]
+    locales = list(Locale.objects.values_list('code', flat=True)) or [None]
+    channels = list(Channel.objects.values_list('slug', flat=True)) or [None]
+    request_time = timezone.now()
+
+    return [
+        {
+            'normandy': {
+                'userId': str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+                'country': rng.choice(countries),
+                'locale': rng.choice(locales),
+                'channel': rng.choice(channels),
+                'request_time': request_time,
+            },
+        }
+        for i in range(count)
+    ]
+
+
+def estimate_reach(recipes, contexts):
+    """
+    Evaluate the filter expression of each recipe against each client
+    context, and return a report of the share of contexts each recipe
+    matched that can be rendered as JSON.
+    """
+    results = []
+    for recipe in recipes:
+        revision = recipe.current_revision
+        result = {
+            'id': recipe.id,
+            'name': recipe.name,
+            'revision_id': revision.id,
+            'match_count': None,
+            'estimate': None,
+            'error': None,
+        }
+
+        try:
+            parsed_expression = parse_revision_expression(revision.id, revision.filter_expression)
+        except ParseError as exc:
+            result['error'] = str(exc)
+        else:
+            recipe_context = {'id': recipe.id, 'arguments': revision.arguments}
+            match_count = sum(
+                evaluate(parsed_expression, {
+                    'normandy': dict(context['normandy'], recipe=recipe_context),
+                })
+                for context in contexts
+            )
+            result['match_count'] = match_count
+            result['estimate'] = match_count / len(contexts) if contexts else 0
+
+        results.append(result)
+
+    return {
+        'context_count': len(contexts),
+        'recipes': results,
+    }
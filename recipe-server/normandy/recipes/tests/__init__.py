@@ -1,4 +1,10 @@
+import base64
 import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
 
 from django.utils import timezone
 
@@ -60,9 +66,17 @@ class RecipeFactory(factory.DjangoModelFactory):
         obj = model_class()
         obj.save()
 
+        # Targeting is passed through `revise` so that it is included in the
+        # revision's filter expression.
+        targeting = {
+            'channels': kwargs.pop('channels', None) or [],
+            'countries': kwargs.pop('countries', None) or [],
+            'locales': kwargs.pop('locales', None) or [],
+        }
+
         revision = RecipeRevisionFactory(**kwargs)
         revision.action.save()
-        obj.revise(**revision.data)
+        obj.revise(**dict(revision.data, **targeting))
 
         return obj
 
@@ -79,33 +93,6 @@ class RecipeFactory(factory.DjangoModelFactory):
         else:
             return None
 
-    @factory.post_generation
-    def channels(self, create, extracted, **kwargs):
-        if not create:
-            return
-
-        if extracted:
-            for channel in extracted:
-                self.channels.add(channel)
-
-    @factory.post_generation
-    def countries(self, create, extracted, **kwargs):
-        if not create:
-            return
-
-        if extracted:
-            for country in extracted:
-                self.countries.add(country)
-
-    @factory.post_generation
-    def locales(self, create, extracted, **kwargs):
-        if not create:
-            return
-
-        if extracted:
-            for locale in extracted:
-                self.locales.add(locale)
-
     # This should always be before `enabled`
     @factory.post_generation
     def approver(self, create, extracted, **kwargs):
@@ -178,3 +165,103 @@ ARGUMENTS_SCHEMA = {
 
 def fake_sign(datas):
     return [{'signature': hashlib.sha256(d).hexdigest()} for d in datas]
+
+
+class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class FakeHTTPServer(object):
+    """
+    A local HTTP server that runs in a background thread between `start`
+    and `stop`. Subclasses implement `handle_request`, which is called
+    with the request handler for every GET and POST request.
+    """
+
+    def __init__(self):
+        self.requests = []
+        self.lock = threading.Lock()
+
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                fake.handle_request(self)
+
+            def do_POST(self):
+                fake.handle_request(self)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = 'http://127.0.0.1:{}/'.format(self.server.server_port)
+
+    def handle_request(self, handler):
+        raise NotImplementedError()
+
+    def send_content(self, handler, content, content_type):
+        handler.send_response(200)
+        handler.send_header('Content-Type', content_type)
+        handler.send_header('Content-Length', str(len(content)))
+        handler.end_headers()
+        handler.wfile.write(content)
+
+    def start(self):
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class FakeAutograph(FakeHTTPServer):
+    """
+    A local HTTP server that signs data like Autograph, using the same
+    fake signatures as `fake_sign`.
+
+    Set `failures` to make that many of the next requests fail with a
+    server error.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.failures = 0
+
+    def handle_request(self, handler):
+        body = handler.rfile.read(int(handler.headers['Content-Length']))
+        with self.lock:
+            self.requests.append(json.loads(body.decode()))
+            failing = self.failures > 0
+            self.failures -= 1 if failing else 0
+
+        if failing:
+            handler.send_response(503)
+            handler.end_headers()
+            return
+
+        datas = [base64.b64decode(item['input']) for item in json.loads(body.decode())]
+        response = [
+            dict(sig, public_key='fake public key', x5u='https://example.com/fake.x5u')
+            for sig in fake_sign(datas)
+        ]
+        self.send_content(handler, json.dumps(response).encode(), 'application/json')
+
+
+class FakeX5uServer(FakeHTTPServer):
+    """
+    A local HTTP server that serves `content` as a certificate chain to
+    any GET request, after waiting `delay` seconds.
+    """
+
+    def __init__(self, content=b''):
+        super().__init__()
+        self.content = content
+        self.delay = 0
+
+    def handle_request(self, handler):
+        with self.lock:
+            self.requests.append(handler.path)
+        time.sleep(self.delay)
+        self.send_content(handler, self.content, 'application/pkix-cert')
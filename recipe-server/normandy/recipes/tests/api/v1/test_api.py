@@ -1,3 +1,4 @@
+import gzip
 import hashlib
 from unittest.mock import patch
 
@@ -10,6 +11,8 @@ from rest_framework.reverse import reverse
 from normandy.base.api.permissions import AdminEnabledOrReadOnly
 from normandy.base.tests import UserFactory, Whatever
 from normandy.base.utils import aware_datetime, canonical_json_dumps
+from normandy.recipes.api.v1.serializers import SignedRecipeSerializer
+from normandy.recipes.api.v1.views import action_implementations
 from normandy.recipes.models import ApprovalRequest, Recipe
 from normandy.recipes.tests import (
     ActionFactory,
@@ -74,6 +77,35 @@ class TestActionAPI(object):
         assert 'max-age=' in res['Cache-Control']
         assert 'public' in res['Cache-Control']
 
+    def test_list_view_supports_etags(self, api_client):
+        ActionFactory()
+        res = api_client.get('/api/v1/action/')
+        assert res.status_code == 200
+        etag = res['ETag']
+
+        res = api_client.get('/api/v1/action/', HTTP_IF_NONE_MATCH=etag)
+        assert res.status_code == 304
+        assert res.content == b''
+        assert 'max-age=' in res['Cache-Control']
+
+        ActionFactory()
+        res = api_client.get('/api/v1/action/', HTTP_IF_NONE_MATCH=etag)
+        assert res.status_code == 200
+        assert res['ETag'] != etag
+
+    def test_list_view_is_compressed(self, api_client):
+        for i in range(3):
+            ActionFactory()
+        res = api_client.get('/api/v1/action/')
+        assert res.status_code == 200
+        identity_content = res.content
+
+        res = api_client.get('/api/v1/action/', HTTP_ACCEPT_ENCODING='gzip')
+        assert res.status_code == 200
+        assert res['Content-Encoding'] == 'gzip'
+        assert 'Accept-Encoding' in res['Vary']
+        assert gzip.decompress(res.content) == identity_content
+
     def test_list_sets_no_cookies(self, api_client):
         res = api_client.get('/api/v1/action/')
         assert res.status_code == 200
@@ -88,6 +120,12 @@ class TestActionAPI(object):
 
 @pytest.mark.django_db
 class TestImplementationAPI(object):
+    @pytest.fixture(autouse=True)
+    def clear_action_implementations(self):
+        action_implementations.clear()
+        yield
+        action_implementations.clear()
+
     def test_it_serves_implementations(self, api_client):
         action = ActionFactory()
         res = api_client.get('/api/v1/action/{name}/implementation/{hash}/'.format(
@@ -133,6 +171,46 @@ class TestImplementationAPI(object):
         assert res.status_code == 200
         assert res.client.cookies == {}
 
+    def test_it_serves_cached_implementations_without_queries(self, api_client):
+        action = ActionFactory()
+        url = '/api/v1/action/{name}/implementation/{hash}/'.format(
+            name=action.name,
+            hash=action.implementation_hash,
+        )
+        assert api_client.get(url).status_code == 200
+
+        with CaptureQueriesContext(connection) as captured:
+            res = api_client.get(url)
+        assert len(captured) == 0
+        assert res.status_code == 200
+        assert res.content.decode() == action.implementation
+        assert res['Content-Type'] == 'application/javascript; charset=utf-8'
+
+    def test_it_serves_compressed_implementations(self, api_client):
+        action = ActionFactory(implementation='console.log("hello");\n' * 100)
+        res = api_client.get(
+            '/api/v1/action/{name}/implementation/{hash}/'.format(
+                name=action.name,
+                hash=action.implementation_hash,
+            ),
+            HTTP_ACCEPT_ENCODING='gzip',
+        )
+        assert res.status_code == 200
+        assert res['Content-Encoding'] == 'gzip'
+        assert 'Accept-Encoding' in res['Vary']
+        assert gzip.decompress(res.content).decode() == action.implementation
+
+    def test_it_does_not_cache_mismatched_hashes(self, api_client):
+        action = ActionFactory(implementation='asdf')
+        bad_hash = hashlib.sha1('nomatch'.encode()).hexdigest()
+        url = '/api/v1/action/{name}/implementation/{hash}/'.format(
+            name=action.name,
+            hash=bad_hash,
+        )
+        assert api_client.get(url).status_code == 404
+        assert api_client.get(url).status_code == 404
+        assert len(action_implementations) == 0
+
 
 @pytest.mark.django_db
 class TestRecipeAPI(object):
@@ -399,11 +477,165 @@ class TestRecipeAPI(object):
         assert len(res.data) == 1
         assert res.data[0]['recipe']['id'] == disabled_recipe.id
 
+    def test_verify_signatures(self, api_client):
+        recipe = RecipeFactory(signed=True)
+        res = api_client.get('/api/v1/recipe/verify_signatures/')
+        assert res.status_code == 200
+        assert res.data['recipe_count'] == 1
+        assert res.data['invalid_recipes'] == [
+            {'id': recipe.id, 'name': recipe.name, 'error': Whatever()},
+        ]
+
+    def test_verify_signatures_requires_an_admin(self, api_client):
+        api_client.force_authenticate(UserFactory())
+        res = api_client.get('/api/v1/recipe/verify_signatures/')
+        assert res.status_code == 403
+
+    def test_reach(self, api_client, settings):
+        settings.TARGETING_ESTIMATE_SAMPLE_SIZE = 10
+        recipe = RecipeFactory(
+            approver=UserFactory(), enabled=True, extra_filter_expression='false')
+        RecipeFactory(enabled=False)
+        res = api_client.get('/api/v1/recipe/reach/')
+        assert res.status_code == 200
+        assert res.data['context_count'] == 10
+        assert [r['id'] for r in res.data['recipes']] == [recipe.id]
+        assert res.data['recipes'][0]['match_count'] == 0
+
+    def test_reach_requires_an_admin(self, api_client):
+        api_client.force_authenticate(UserFactory())
+        res = api_client.get('/api/v1/recipe/reach/')
+        assert res.status_code == 403
+
+    def test_signed_listing_is_serialized_once_per_version(self, api_client):
+        RecipeFactory(signed=True)
+
+        serializer_patch = patch('normandy.recipes.api.v1.views.SignedRecipeSerializer',
+                                 wraps=SignedRecipeSerializer)
+        with serializer_patch as serializer:
+            res1 = api_client.get('/api/v1/recipe/signed/')
+            res2 = api_client.get('/api/v1/recipe/signed/')
+            assert serializer.call_count == 1
+
+        assert res1.status_code == 200
+        assert res2.status_code == 200
+        assert res1.content == res2.content
+        assert res1['Content-Type'] == 'application/json'
+
+    def test_signed_listing_updates_when_signatures_change(self, api_client):
+        r1 = RecipeFactory(signed=True)
+        res = api_client.get('/api/v1/recipe/signed/')
+        assert res.status_code == 200
+        assert len(res.data) == 1
+
+        r2 = RecipeFactory(signed=True)
+        res = api_client.get('/api/v1/recipe/signed/')
+        assert res.status_code == 200
+        assert sorted(r['recipe']['id'] for r in res.data) == sorted([r1.id, r2.id])
+
+        r1.signature.signature = 'new signature'
+        r1.signature.save()
+        res = api_client.get('/api/v1/recipe/signed/')
+        assert res.status_code == 200
+        signatures = {r['recipe']['id']: r['signature']['signature'] for r in res.data}
+        assert signatures[r1.id] == 'new signature'
+
+    def test_signed_listing_supports_etags(self, api_client):
+        recipe = RecipeFactory(signed=True)
+        res = api_client.get('/api/v1/recipe/signed/?enabled=0')
+        assert res.status_code == 200
+        etag = res['ETag']
+
+        serializer_patch = patch('normandy.recipes.api.v1.views.SignedRecipeSerializer')
+        with serializer_patch as serializer:
+            res = api_client.get('/api/v1/recipe/signed/?enabled=0', HTTP_IF_NONE_MATCH=etag)
+            assert not serializer.called
+        assert res.status_code == 304
+        assert res['ETag'] == etag
+
+        recipe.signature.signature = 'new signature'
+        recipe.signature.save()
+        res = api_client.get('/api/v1/recipe/signed/?enabled=0', HTTP_IF_NONE_MATCH=etag)
+        assert res.status_code == 200
+        assert res['ETag'] != etag
+
+    def test_signed_listing_etag_changes_with_serialization_version(self, api_client, mocker):
+        RecipeFactory(signed=True)
+        res = api_client.get('/api/v1/recipe/signed/')
+        assert res.status_code == 200
+        etag = res['ETag']
+
+        mocker.patch('normandy.recipes.models.SIGNED_RECIPES_SERIALIZATION_VERSION', 2)
+        res = api_client.get('/api/v1/recipe/signed/', HTTP_IF_NONE_MATCH=etag)
+        assert res.status_code == 200
+        assert res['ETag'] != etag
+
+    def test_signed_listing_is_compressed(self, api_client):
+        for i in range(3):
+            RecipeFactory(signed=True)
+        res = api_client.get('/api/v1/recipe/signed/')
+        assert res.status_code == 200
+        assert 'Accept-Encoding' in res['Vary']
+        assert 'Content-Encoding' not in res
+        identity_etag = res['ETag']
+        identity_content = res.content
+
+        res = api_client.get('/api/v1/recipe/signed/', HTTP_ACCEPT_ENCODING='gzip')
+        assert res.status_code == 200
+        assert res['Content-Encoding'] == 'gzip'
+        assert 'Accept-Encoding' in res['Vary']
+        assert gzip.decompress(res.content) == identity_content
+        assert res['ETag'] == identity_etag[:-1] + '-gzip"'
+
+        gzip_etag = res['ETag']
+        res = api_client.get(
+            '/api/v1/recipe/signed/', HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=gzip_etag)
+        assert res.status_code == 304
+        assert res['ETag'] == gzip_etag
+        assert 'Accept-Encoding' in res['Vary']
+
     def test_list_sets_no_cookies(self, api_client):
         res = api_client.get('/api/v1/recipe/')
         assert res.status_code == 200
         assert 'Cookies' not in res
 
+    def test_list_makes_a_constant_number_of_queries(self, api_client):
+        def create_recipes():
+            channel = ChannelFactory()
+            country = CountryFactory()
+            locale = LocaleFactory()
+            RecipeFactory(channels=[channel], countries=[country], locales=[locale])
+            RecipeFactory(
+                approver=UserFactory(), enabled=True, channels=[channel], countries=[country],
+                locales=[locale])
+
+        def count_queries():
+            queries = CaptureQueriesContext(connection)
+            with queries:
+                res = api_client.get('/api/v1/recipe/')
+                assert res.status_code == 200
+            return len(queries)
+
+        create_recipes()
+        expected_queries = count_queries()
+        for i in range(3):
+            create_recipes()
+        assert count_queries() == expected_queries
+
+    def test_signed_listing_makes_a_constant_number_of_queries(self, api_client):
+        def count_queries():
+            queries = CaptureQueriesContext(connection)
+            with queries:
+                res = api_client.get('/api/v1/recipe/signed/')
+                assert res.status_code == 200
+            return len(queries)
+
+        channel = ChannelFactory()
+        RecipeFactory(signed=True, channels=[channel])
+        expected_queries = count_queries()
+        RecipeFactory.create_batch(3, signed=True, channels=[channel])
+        assert count_queries() == expected_queries
+
     def test_detail_sets_no_cookies(self, api_client):
         recipe = RecipeFactory()
         res = api_client.get('/api/v1/recipe/{id}/'.format(id=recipe.id))
@@ -646,11 +878,36 @@ class TestClassifyClient(object):
             res = api_client.get('/api/v1/classify_client/')
 
         assert res.status_code == 200
-        assert res.data == {
+        assert res['Content-Type'] == 'application/json'
+        assert res.json() == {
             'country': 'us',
             'request_time': '2016-01-01T00:00:00Z',
         }
 
+    def test_it_matches_the_drf_output(self, client):
+        get_country_code_patch = patch('normandy.recipes.models.get_country_code')
+        timezone_patch = patch('normandy.base.middleware.timezone')
+
+        with get_country_code_patch as get_country_code, timezone_patch as timezone:
+            get_country_code.return_value = 'us'
+            timezone.now.return_value = aware_datetime(2016, 1, 1, 12, 30, 15, 123456)
+            res = client.get('/api/v1/classify_client/')
+
+        # This is what the DRF view that served this endpoint produced.
+        assert res.status_code == 200
+        assert res.content == b'{"country":"us","request_time":"2016-01-01T12:30:15.123456Z"}'
+
+    def test_it_skips_extra_middleware(self, client, mocker):
+        process_request = mocker.patch(
+            'django.contrib.sessions.middleware.SessionMiddleware.process_request')
+        res = client.get('/api/v1/classify_client/')
+        assert res.status_code == 200
+        assert not process_request.called
+
+    def test_it_only_allows_safe_methods(self, client):
+        res = client.post('/api/v1/classify_client/')
+        assert res.status_code == 405
+
     def test_makes_no_db_queries(self, client):
         queries = CaptureQueriesContext(connection)
         with queries:
@@ -1,9 +1,16 @@
+import gzip
+import json
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
 import pytest
 from rest_framework.reverse import reverse
 
 from normandy.base.api.permissions import AdminEnabledOrReadOnly
 from normandy.base.tests import UserFactory, Whatever
 from normandy.base.utils import canonical_json_dumps
+from normandy.recipes.api.v2.views import recipe_list_snapshots
 from normandy.recipes.models import ApprovalRequest, Recipe
 from normandy.recipes.tests import (
     ActionFactory,
@@ -16,6 +23,25 @@ from normandy.recipes.tests import (
 )
 
 
+@pytest.fixture(autouse=True)
+def clear_recipe_list_snapshots():
+    # List versions are rolled back with each test, so they are reused.
+    recipe_list_snapshots.clear()
+    yield
+    recipe_list_snapshots.clear()
+
+
+def get_all_pages(api_client, url):
+    """Follow the cursors from `url` and return the ids in each page."""
+    pages = []
+    while url:
+        res = api_client.get(url)
+        assert res.status_code == 200
+        pages.append([obj['id'] for obj in res.data['results']])
+        url = res.data['next']
+    return pages
+
+
 @pytest.mark.django_db
 class TestActionAPI(object):
     def test_it_works(self, api_client):
@@ -86,6 +112,113 @@ class TestRecipeAPI(object):
         assert res.status_code == 200
         assert res.data[0]['name'] == recipe.name
 
+    def test_it_paginates_with_cursors(self, api_client):
+        recipe_ids = sorted((RecipeFactory().id for i in range(3)), reverse=True)
+
+        results = get_all_pages(api_client, '/api/v2/recipe/?page_size=2')
+        assert results == [recipe_ids[:2], recipe_ids[2:]]
+
+    def test_it_is_not_paginated_without_a_page_size(self, api_client):
+        for i in range(3):
+            RecipeFactory()
+
+        res = api_client.get('/api/v2/recipe/')
+        assert res.status_code == 200
+        assert len(res.data) == 3
+
+    def test_list_is_compressed(self, api_client):
+        for i in range(3):
+            RecipeFactory()
+
+        res = api_client.get('/api/v2/recipe/', HTTP_ACCEPT_ENCODING='gzip')
+        assert res.status_code == 200
+        assert res['Content-Encoding'] == 'gzip'
+        assert 'Accept-Encoding' in res['Vary']
+        data = json.loads(gzip.decompress(res.content).decode())
+        assert len(data) == 3
+
+        res = api_client.get('/api/v2/recipe/')
+        assert res.status_code == 200
+        assert 'Content-Encoding' not in res
+        assert 'Accept-Encoding' in res['Vary']
+
+    def test_list_is_only_serialized_once_per_version(self, api_client):
+        RecipeFactory()
+        res = api_client.get('/api/v2/recipe/')
+        assert res.status_code == 200
+
+        with CaptureQueriesContext(connection) as queries:
+            cached_res = api_client.get('/api/v2/recipe/')
+        assert cached_res.status_code == 200
+        assert cached_res.content == res.content
+        # Only the list's version is read.
+        assert len(queries) == 1
+
+    def test_list_changes_when_a_recipe_is_saved(self, api_client):
+        recipe = RecipeFactory()
+        res = api_client.get('/api/v2/recipe/')
+        assert res.status_code == 200
+        assert res.data[0]['enabled'] is False
+
+        recipe.approved_revision = recipe.latest_revision
+        recipe.enabled = True
+        recipe.save()
+        res = api_client.get('/api/v2/recipe/')
+        assert res.status_code == 200
+        assert res.data[0]['enabled'] is True
+
+    def test_list_changes_with_channels(self, api_client):
+        channel = ChannelFactory()
+        recipe = RecipeFactory()
+        res = api_client.get('/api/v2/recipe/')
+        assert res.status_code == 200
+        assert res.data[0]['channels'] == []
+
+        recipe.latest_revision.channels.add(channel)
+        res = api_client.get('/api/v2/recipe/')
+        assert res.status_code == 200
+        assert res.data[0]['channels'] == [channel.slug]
+
+    def test_list_is_keyed_on_known_query_parameters(self, api_client):
+        RecipeFactory()
+        res = api_client.get('/api/v2/recipe/?status=enabled&fields=id')
+        assert res.status_code == 200
+
+        with CaptureQueriesContext(connection) as queries:
+            res = api_client.get('/api/v2/recipe/?fields=id&status=enabled')
+        assert res.status_code == 200
+        assert len(queries) == 1
+
+    def test_list_skips_snapshots_for_unknown_query_parameters(self, api_client):
+        RecipeFactory()
+        res = api_client.get('/api/v2/recipe/?cachebust=1')
+        assert res.status_code == 200
+        assert len(res.data) == 1
+        assert 'ETag' not in res
+        assert 'Cache-Control' in res
+        assert recipe_list_snapshots._snapshots == {}
+
+    def test_list_changes_with_approval(self, api_client):
+        recipe = RecipeFactory()
+        approval_request = ApprovalRequestFactory(revision=recipe.latest_revision)
+        res = api_client.get('/api/v2/recipe/')
+        assert res.status_code == 200
+        assert res.data[0]['approval_request']['approved'] is None
+
+        approval_request.approve(UserFactory(), 'r+')
+        res = api_client.get('/api/v2/recipe/')
+        assert res.status_code == 200
+        assert res.data[0]['approval_request']['approved'] is True
+        assert res.data[0]['approved_revision'] is not None
+
+    def test_list_returns_not_modified(self, api_client):
+        RecipeFactory()
+        res = api_client.get('/api/v2/recipe/')
+        assert res.status_code == 200
+
+        res = api_client.get('/api/v2/recipe/', HTTP_IF_NONE_MATCH=res['ETag'])
+        assert res.status_code == 304
+
     def test_it_can_create_recipes(self, api_client):
         action = ActionFactory()
 
@@ -161,6 +294,22 @@ class TestRecipeAPI(object):
         recipes = Recipe.objects.all()
         assert recipes.count() == 0
 
+    def test_creation_uses_the_current_arguments_schema(self, api_client):
+        action = ActionFactory(arguments_schema={'type': 'object'})
+        data = {
+            'name': 'Test Recipe',
+            'extra_filter_expression': 'true',
+            'action_id': action.id,
+            'arguments': {'message': ''},
+        }
+        res = api_client.post('/api/v2/recipe/', data)
+        assert res.status_code == 201
+
+        action.arguments_schema = {'type': 'object', 'required': ['message']}
+        action.save()
+        res = api_client.post('/api/v2/recipe/', dict(data, name='Test Recipe 2'))
+        assert res.status_code == 400
+
     def test_it_can_change_action_for_recipes(self, api_client):
         recipe = RecipeFactory()
         action = ActionFactory()
@@ -298,6 +447,67 @@ class TestRecipeAPI(object):
         assert res.status_code == 200
         assert 'Cookies' not in res
 
+    def test_list_makes_a_constant_number_of_queries(self, api_client):
+        def create_recipes():
+            channel = ChannelFactory()
+            country = CountryFactory()
+            locale = LocaleFactory()
+            RecipeFactory(channels=[channel], countries=[country], locales=[locale])
+            RecipeFactory(
+                approver=UserFactory(), enabled=True, channels=[channel], countries=[country],
+                locales=[locale])
+
+        def count_queries():
+            queries = CaptureQueriesContext(connection)
+            with queries:
+                res = api_client.get('/api/v2/recipe/')
+                assert res.status_code == 200
+            return len(queries)
+
+        create_recipes()
+        expected_queries = count_queries()
+        for i in range(3):
+            create_recipes()
+        assert count_queries() == expected_queries
+
+    def test_list_serializes_requested_fields(self, api_client):
+        recipe = RecipeFactory()
+
+        res = api_client.get('/api/v2/recipe/?fields=id,name,enabled,unknown')
+        assert res.status_code == 200
+        assert res.data == [{'id': recipe.id, 'name': recipe.name, 'enabled': False}]
+
+        res = api_client.get('/api/v2/recipe/?omit=latest_revision,approved_revision,action')
+        assert res.status_code == 200
+        assert 'latest_revision' not in res.data[0]
+        assert 'approved_revision' not in res.data[0]
+        assert 'action' not in res.data[0]
+        assert res.data[0]['name'] == recipe.name
+
+    def test_detail_serializes_requested_fields(self, api_client):
+        recipe = RecipeFactory()
+        res = api_client.get(f'/api/v2/recipe/{recipe.id}/?fields=id,name&omit=name')
+        assert res.status_code == 200
+        assert res.data == {'id': recipe.id}
+
+    def test_requested_fields_skip_queries(self, api_client):
+        channel = ChannelFactory()
+        RecipeFactory(channels=[channel])
+        RecipeFactory(approver=UserFactory(), enabled=True, channels=[channel])
+
+        with CaptureQueriesContext(connection) as all_fields:
+            res = api_client.get('/api/v2/recipe/')
+            assert res.status_code == 200
+
+        with CaptureQueriesContext(connection) as some_fields:
+            res = api_client.get('/api/v2/recipe/?fields=id,name,enabled,last_updated')
+            assert res.status_code == 200
+
+        # Besides the list's version, only the recipes and their revisions
+        # are needed.
+        assert len(some_fields) == 2
+        assert len(some_fields) < len(all_fields)
+
     def test_detail_sets_no_cookies(self, api_client):
         recipe = RecipeFactory()
         res = api_client.get('/api/v2/recipe/{id}/'.format(id=recipe.id))
@@ -440,6 +650,29 @@ class TestRecipeRevisionAPI(object):
         assert res.status_code == 200
         assert res.data['id'] == recipe.latest_revision.id
 
+    def test_it_paginates_with_cursors(self, api_client):
+        revisions = [RecipeFactory().latest_revision for i in range(5)]
+        expected_ids = [
+            revision.id for revision in
+            sorted(revisions, key=lambda r: (r.created, r.id), reverse=True)
+        ]
+
+        results = get_all_pages(api_client, '/api/v2/recipe_revision/?page_size=2')
+        assert results == [expected_ids[:2], expected_ids[2:4], expected_ids[4:]]
+
+    def test_pages_do_not_scan_earlier_revisions(self, api_client):
+        for i in range(5):
+            RecipeFactory()
+        res = api_client.get('/api/v2/recipe_revision/?page_size=2')
+        assert res.status_code == 200
+
+        with CaptureQueriesContext(connection) as captured:
+            res = api_client.get(res.data['next'])
+        assert res.status_code == 200
+        # The page is found by seeking from the cursor's position.
+        assert any('"recipes_reciperevision"."created" <' in q['sql'] for q in captured)
+        assert not any('OFFSET' in q['sql'] for q in captured)
+
     def test_request_approval(self, api_client):
         recipe = RecipeFactory()
         res = api_client.post(
@@ -462,6 +695,16 @@ class TestApprovalRequestAPI(object):
         assert res.status_code == 200
         assert res.data == []
 
+    def test_it_paginates_with_cursors(self, api_client):
+        approval_requests = [ApprovalRequestFactory() for i in range(3)]
+        expected_ids = [
+            approval_request.id for approval_request in
+            sorted(approval_requests, key=lambda a: (a.created, a.id), reverse=True)
+        ]
+
+        results = get_all_pages(api_client, '/api/v2/approval_request/?page_size=2')
+        assert results == [expected_ids[:2], expected_ids[2:]]
+
     def test_approve(self, api_client):
         r = RecipeFactory()
         a = ApprovalRequestFactory(revision=r.latest_revision)
@@ -1,3 +1,5 @@
+import json
+from io import StringIO
 from unittest.mock import patch
 from datetime import timedelta
 
@@ -7,6 +9,7 @@ import pytest
 from reversion.models import Version
 
 from normandy.base.tests import UserFactory
+from normandy.recipes import signing
 from normandy.recipes.models import Action
 from normandy.recipes.tests import ActionFactory, RecipeFactory
 
@@ -158,3 +161,62 @@ class TestUpdateRecipeSignatures(object):
         call_command('update_recipe_signatures', '--force')
         r.refresh_from_db()
         assert r.signature.signature is not 'old signature'
+
+
+@pytest.mark.django_db
+class TestVerifySignatures(object):
+    def test_it_works(self):
+        stdout = StringIO()
+        call_command('verify_signatures', stdout=stdout)
+        report = json.loads(stdout.getvalue())
+        assert report['recipe_count'] == 0
+        assert report['invalid_recipes'] == []
+
+    def test_it_reports_invalid_signatures(self):
+        recipe = RecipeFactory(signed=True)
+        RecipeFactory(signed=False)
+        stdout = StringIO()
+        call_command('verify_signatures', stdout=stdout)
+        report = json.loads(stdout.getvalue())
+        assert report['recipe_count'] == 1
+        assert report['invalid_count'] == 1
+        assert report['invalid_recipes'] == [
+            {'id': recipe.id, 'name': recipe.name, 'error': signing.WrongSignatureSize.detail},
+        ]
+
+    def test_it_only_verifies_enabled_recipes(self):
+        RecipeFactory(signed=True, approver=UserFactory(), enabled=True)
+        RecipeFactory(signed=True, enabled=False)
+        stdout = StringIO()
+        call_command('verify_signatures', '--enabled', stdout=stdout)
+        report = json.loads(stdout.getvalue())
+        assert report['recipe_count'] == 1
+
+    def test_it_uses_the_process_setting(self, settings, mocker):
+        settings.SIGNATURE_VERIFICATION_PROCESSES = 3
+        verify_signatures = mocker.patch(
+            'normandy.recipes.models.RecipeQuerySet.verify_signatures',
+            return_value={})
+        call_command('verify_signatures', stdout=StringIO())
+        verify_signatures.assert_called_once_with(processes=3)
+
+    def test_processes_option(self, mocker):
+        verify_signatures = mocker.patch(
+            'normandy.recipes.models.RecipeQuerySet.verify_signatures',
+            return_value={})
+        call_command('verify_signatures', '--processes', '2', stdout=StringIO())
+        verify_signatures.assert_called_once_with(processes=2)
+
+
+@pytest.mark.django_db
+class TestEstimateReach(object):
+    def test_it_works(self):
+        recipe = RecipeFactory(
+            approver=UserFactory(), enabled=True, extra_filter_expression='true')
+        RecipeFactory(enabled=False)
+        stdout = StringIO()
+        call_command('estimate_reach', '--sample-size', '20', '--seed', '1', stdout=stdout)
+        report = json.loads(stdout.getvalue())
+        assert report['context_count'] == 20
+        assert [r['id'] for r in report['recipes']] == [recipe.id]
+        assert report['recipes'][0]['estimate'] == 1
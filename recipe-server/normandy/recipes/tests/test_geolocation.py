@@ -1,9 +1,16 @@
+from unittest.mock import MagicMock
+
 import pytest
-from geoip2.errors import GeoIP2Error
+from geoip2.errors import AddressNotFoundError, GeoIP2Error
 
 from normandy.base.tests import Whatever
+from normandy.recipes import geolocation as geolocation_module
 from normandy.recipes.geolocation import (
+    CountryCache,
+    GeoIPDatabase,
+    get_country_code,
     load_geoip_database,
+    reload_geoip_database_if_changed,
     WARNING_CANNOT_LOAD_DATABASE,
     WARNING_UNKNOWN_GEOIP_ERROR,
 )
@@ -14,6 +21,15 @@ def mock_logger(mocker):
     return mocker.patch('normandy.recipes.geolocation.logger')
 
 
+@pytest.fixture
+def mock_reader(mocker):
+    """Replace the shared database with a mock reader and an empty cache."""
+    reader = MagicMock()
+    mocker.patch('normandy.recipes.geolocation.geoip_database', GeoIPDatabase(
+        reader=reader, country_cache=CountryCache(max_size=10, ttl=60), mtime=None))
+    return reader
+
+
 class TestGetCountryCode(object):
     def test_it_works(self, geolocation):
         assert geolocation.get_country_code('207.126.102.129') == 'US'
@@ -22,8 +38,7 @@ class TestGetCountryCode(object):
         # MaxMind doesn't have 127.0.0.1 in it's DB. For good reason.
         assert geolocation.get_country_code('127.0.0.1') is None
 
-    def test_it_logs_when_geoip_fails(self, geolocation, mocker, mock_logger):
-        mock_reader = mocker.patch('normandy.recipes.geolocation.geoip_reader')
+    def test_it_logs_when_geoip_fails(self, geolocation, mock_reader, mock_logger):
         mock_reader.country.side_effect = GeoIP2Error()
 
         assert geolocation.get_country_code('207.126.102.129') is None
@@ -32,6 +47,67 @@ class TestGetCountryCode(object):
             extra={'code': WARNING_UNKNOWN_GEOIP_ERROR}
         )
 
+    def test_it_caches_lookups(self, geolocation, mocker, mock_reader):
+        mock_statsd = mocker.patch('normandy.recipes.geolocation.statsd')
+        reader = mock_reader
+        reader.country.return_value.country.iso_code = 'US'
+
+        assert get_country_code('207.126.102.129') == 'US'
+        assert get_country_code('207.126.102.129') == 'US'
+        assert reader.country.call_count == 1
+        mock_statsd.incr.assert_any_call('geolocation.cache.miss')
+        mock_statsd.incr.assert_any_call('geolocation.cache.hit')
+
+    def test_it_caches_unknown_ips(self, geolocation, mock_reader):
+        reader = mock_reader
+        reader.country.side_effect = AddressNotFoundError()
+
+        assert get_country_code('127.0.0.1') is None
+        assert get_country_code('127.0.0.1') is None
+        assert reader.country.call_count == 1
+
+    def test_it_doesnt_cache_errors(self, geolocation, mock_reader, mock_logger):
+        reader = mock_reader
+        reader.country.side_effect = GeoIP2Error()
+
+        assert get_country_code('207.126.102.129') is None
+        assert get_country_code('207.126.102.129') is None
+        assert reader.country.call_count == 2
+
+
+class TestCountryCache(object):
+    def test_it_works(self):
+        cache = CountryCache(max_size=10, ttl=60)
+        assert cache.get('1.2.3.4') is CountryCache.MISSING
+        cache.set('1.2.3.4', 'US')
+        cache.set('5.6.7.8', None)
+        assert cache.get('1.2.3.4') == 'US'
+        assert cache.get('5.6.7.8') is None
+
+    def test_it_evicts_least_recently_used(self):
+        cache = CountryCache(max_size=2, ttl=60)
+        cache.set('1.1.1.1', 'US')
+        cache.set('2.2.2.2', 'CA')
+        cache.get('1.1.1.1')
+        cache.set('3.3.3.3', 'FR')
+
+        assert len(cache) == 2
+        assert cache.get('1.1.1.1') == 'US'
+        assert cache.get('2.2.2.2') is CountryCache.MISSING
+        assert cache.get('3.3.3.3') == 'FR'
+
+    def test_entries_expire(self, mocker):
+        mock_time = mocker.patch('normandy.recipes.geolocation.time')
+        mock_time.monotonic.return_value = 100
+        cache = CountryCache(max_size=10, ttl=60)
+        cache.set('1.2.3.4', 'US')
+
+        mock_time.monotonic.return_value = 150
+        assert cache.get('1.2.3.4') == 'US'
+
+        mock_time.monotonic.return_value = 161
+        assert cache.get('1.2.3.4') is CountryCache.MISSING
+
 
 class TestLoadGeoIPDatabase(object):
     def test_it_warns_when_cant_load_database(self, mocker, mock_logger):
@@ -43,3 +119,75 @@ class TestLoadGeoIPDatabase(object):
             Whatever(),
             extra={'code': WARNING_CANNOT_LOAD_DATABASE}
         )
+
+    def test_it_clears_the_cache(self, mocker):
+        # Restore the shared database after the test
+        mocker.patch('normandy.recipes.geolocation.geoip_database')
+        mocker.patch('normandy.recipes.geolocation.Reader')
+        load_geoip_database()
+        geolocation_module.geoip_database.country_cache.set('1.2.3.4', 'US')
+
+        load_geoip_database()
+        assert (geolocation_module.geoip_database.country_cache.get('1.2.3.4') is
+                CountryCache.MISSING)
+
+    def test_it_keeps_the_old_reader_on_failure(self, mocker):
+        mocker.patch('normandy.recipes.geolocation.geoip_database')
+        MockReader = mocker.patch('normandy.recipes.geolocation.Reader')
+        load_geoip_database()
+        database = geolocation_module.geoip_database
+        database.country_cache.set('1.2.3.4', 'US')
+
+        MockReader.side_effect = IOError()
+        load_geoip_database()
+        assert geolocation_module.geoip_database.reader is database.reader
+        assert geolocation_module.geoip_database.mtime == database.mtime
+        assert geolocation_module.geoip_database.country_cache is not database.country_cache
+
+
+class TestReloadGeoIPDatabaseIfChanged(object):
+    @pytest.fixture
+    def database(self, mocker, settings, tmpdir):
+        # Restore the shared database after the test
+        mocker.patch('normandy.recipes.geolocation.geoip_database')
+        mocker.patch('normandy.recipes.geolocation._next_reload_check', 0)
+
+        database = tmpdir.join('GeoLite2-Country.mmdb')
+        database.write('')
+        settings.GEOIP2_DATABASE = database.strpath
+        settings.GEOIP2_RELOAD_INTERVAL = 60
+        return database
+
+    def test_it_reloads_when_the_database_changes(self, database, mocker):
+        MockReader = mocker.patch('normandy.recipes.geolocation.Reader')
+        load_geoip_database()
+        assert MockReader.call_count == 1
+
+        database.setmtime(database.mtime() + 10)
+        reload_geoip_database_if_changed()
+        assert MockReader.call_count == 2
+        assert geolocation_module.geoip_database.reader is MockReader.return_value
+
+    def test_it_doesnt_reload_unchanged_databases(self, database, mocker):
+        MockReader = mocker.patch('normandy.recipes.geolocation.Reader')
+        load_geoip_database()
+        reload_geoip_database_if_changed()
+        assert MockReader.call_count == 1
+
+    def test_it_checks_once_per_interval(self, database, mocker):
+        MockReader = mocker.patch('normandy.recipes.geolocation.Reader')
+        load_geoip_database()
+        reload_geoip_database_if_changed()
+
+        database.setmtime(database.mtime() + 10)
+        reload_geoip_database_if_changed()
+        assert MockReader.call_count == 1
+
+    def test_it_can_be_disabled(self, database, mocker, settings):
+        settings.GEOIP2_RELOAD_INTERVAL = 0
+        MockReader = mocker.patch('normandy.recipes.geolocation.Reader')
+        load_geoip_database()
+
+        database.setmtime(database.mtime() + 10)
+        reload_geoip_database_if_changed()
+        assert MockReader.call_count == 1
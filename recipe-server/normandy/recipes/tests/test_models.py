@@ -1,18 +1,27 @@
+import base64
 import hashlib
+import importlib
 from unittest.mock import patch
 
 from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
+import ecdsa
 import pytest
 from rest_framework import serializers
 
 from normandy.base.tests import UserFactory, Whatever
+from normandy.recipes import signing
 from normandy.recipes.models import (
     ApprovalRequest,
     Client,
+    ExperimentSlug,
     INFO_CREATE_REVISION,
     INFO_REQUESTING_RECIPE_SIGNATURES,
+    INFO_UPDATED_RECIPE_SIGNATURES,
     Recipe,
+    RecipeListVersion,
     RecipeRevision,
     WARNING_BYPASSING_PEER_APPROVAL,
 )
@@ -135,6 +144,57 @@ class TestValidateArgumentPreferenceExperiments(object):
         assert exc_info1.value.detail == {'arguments': {'slug': error}}
 
 
+@pytest.mark.django_db
+class TestExperimentSlug(object):
+    def test_slug_can_be_reused_after_change(self):
+        action = ActionFactory(name='preference-experiment')
+        recipe = RecipeFactory(action=action, arguments={'slug': 'a', 'branches': []})
+        recipe.revise(arguments={'slug': 'b', 'branches': []})
+        # Does not throw, since no recipe is using the slug anymore
+        RecipeFactory(action=action, arguments={'slug': 'a', 'branches': []})
+
+    def test_slugs_are_stored(self):
+        action = ActionFactory(name='preference-experiment')
+        recipe = RecipeFactory(action=action, arguments={'slug': 'a', 'branches': []})
+        assert ExperimentSlug.objects.get(recipe=recipe).slug == 'a'
+
+        recipe.revise(arguments={'slug': 'b', 'branches': []})
+        assert ExperimentSlug.objects.get(recipe=recipe).slug == 'b'
+
+        recipe.revise(action=ActionFactory(), arguments={})
+        assert not ExperimentSlug.objects.filter(recipe=recipe).exists()
+
+    def test_check_does_not_scan_experiments(self):
+        action = ActionFactory(name='preference-experiment')
+        RecipeFactory(action=action, arguments={'slug': 'a', 'branches': []})
+        with CaptureQueriesContext(connection) as queries:
+            action.validate_arguments({'slug': 'new', 'branches': []})
+
+        for i in range(5):
+            RecipeFactory(action=action, arguments={'slug': f'slug-{i}', 'branches': []})
+        with CaptureQueriesContext(connection) as many_queries:
+            action.validate_arguments({'slug': 'new', 'branches': []})
+
+        assert len(many_queries) == len(queries) == 1
+
+    def test_conflicting_slug_is_a_validation_error(self):
+        action = ActionFactory(name='preference-experiment')
+        recipe_a = RecipeFactory(action=action, arguments={'slug': 'a', 'branches': []})
+        recipe_b = RecipeFactory(action=action, arguments={'slug': 'b', 'branches': []})
+        revision = recipe_b.latest_revision
+        # Simulate another recipe taking the slug without validation noticing.
+        ExperimentSlug.objects.filter(recipe=recipe_b).delete()
+        ExperimentSlug.objects.filter(recipe=recipe_a).update(slug='b')
+
+        with pytest.raises(serializers.ValidationError) as exc_info:
+            recipe_b.revise(force=True, extra_filter_expression='false')
+        error = action.errors['duplicate_experiment_slug']
+        assert exc_info.value.detail == {'arguments': {'slug': error}}
+
+        recipe_b.refresh_from_db()
+        assert recipe_b.latest_revision == revision
+
+
 @pytest.mark.django_db
 class TestRecipe(object):
     def test_revision_id_doesnt_change_if_no_changes(self):
@@ -188,6 +248,74 @@ class TestRecipe(object):
                                        "(normandy.channel in ['beta']) && "
                                        "(2 + 2 == 4)")
 
+    def test_filter_expression_is_stored(self):
+        channel = ChannelFactory(slug='beta')
+        recipe = RecipeFactory(channels=[channel], extra_filter_expression='2 + 2 == 4')
+        revision = RecipeRevision.objects.get(id=recipe.latest_revision.id)
+
+        queries = CaptureQueriesContext(connection)
+        with queries:
+            assert revision.filter_expression == "(normandy.channel in ['beta']) && (2 + 2 == 4)"
+        assert len(queries) == 0
+
+    def test_fingerprint_is_stored(self):
+        action = ActionFactory()
+        content = {
+            'name': 'same',
+            'action': action,
+            'arguments': {'foo': 1},
+            'extra_filter_expression': 'true',
+            'channels': [ChannelFactory(slug='beta')],
+        }
+        recipe1 = RecipeFactory(**content)
+        recipe2 = RecipeFactory(**content)
+        assert len(recipe1.latest_revision.fingerprint) == 64
+        assert recipe1.latest_revision.fingerprint == recipe2.latest_revision.fingerprint
+
+        recipe2.revise(name='different')
+        assert recipe1.latest_revision.fingerprint != recipe2.latest_revision.fingerprint
+
+    def test_revise_ignores_order_of_targeting_and_arguments(self):
+        channel1 = ChannelFactory(slug='beta')
+        channel2 = ChannelFactory(slug='release')
+        recipe = RecipeFactory(channels=[channel1, channel2], arguments={'a': 1, 'b': 2})
+        revision_id = recipe.latest_revision.id
+
+        recipe.revise(channels=[channel2, channel1], arguments={'b': 2, 'a': 1})
+        assert recipe.latest_revision.id == revision_id
+
+    def test_revise_only_reads_targeting_that_is_kept(self):
+        channel = ChannelFactory()
+        recipe = RecipeFactory(name='my name', channels=[channel])
+        revision_id = recipe.latest_revision.id
+
+        recipe = Recipe.objects.get(id=recipe.id)
+        with CaptureQueriesContext(connection) as queries:
+            recipe.revise(name='my name', channels=[channel], countries=[], locales=[])
+        assert recipe.latest_revision.id == revision_id
+        assert not any('reciperevision_' in query['sql'] for query in queries)
+
+        with CaptureQueriesContext(connection) as queries:
+            recipe.revise(name='my name', countries=[], locales=[])
+        assert recipe.latest_revision.id == revision_id
+        assert any('reciperevision_channels' in query['sql'] for query in queries)
+
+    def test_revise_writes_relations_in_bulk(self):
+        locales = [LocaleFactory(code=f'locale-{i}') for i in range(20)]
+        countries = [CountryFactory(code=f'country-{i}') for i in range(20)]
+
+        recipe = RecipeFactory()
+        with CaptureQueriesContext(connection) as queries:
+            recipe.revise(locales=locales[:1], countries=countries[:1])
+
+        recipe = RecipeFactory()
+        with CaptureQueriesContext(connection) as many_queries:
+            recipe.revise(locales=locales, countries=countries)
+
+        assert len(many_queries) == len(queries)
+        assert recipe.latest_revision.locales.count() == 20
+        assert recipe.latest_revision.countries.count() == 20
+
     def test_canonical_json(self):
         recipe = RecipeFactory(
             action=ActionFactory(name='action'),
@@ -508,6 +636,27 @@ class TestRecipeRevision(object):
         revision = RecipeRevision.objects.get(pk=revision.pk)
         assert revision.approval_status == revision.REJECTED
 
+    def test_hash_is_unchanged_by_storing_filter_expressions(self):
+        # Filter expressions used to be built from the targeting whenever
+        # they were read, and migration 0043 stores the same expression.
+        migration = importlib.import_module(
+            'normandy.recipes.migrations.0043_reciperevision_filter_expression')
+        recipe = RecipeFactory(
+            extra_filter_expression='2 + 2 == 4',
+            channels=[ChannelFactory(slug='beta')],
+            countries=[CountryFactory(code='US')],
+            locales=[LocaleFactory(code='en-US')],
+        )
+        revision = RecipeRevision.objects.get(pk=recipe.latest_revision.pk)
+        revision.filter_expression = migration.build_filter_expression(revision)
+
+        expression = ("(normandy.locale in ['en-US']) && (normandy.country in ['US']) && "
+                      "(normandy.channel in ['beta']) && (2 + 2 == 4)")
+        data = '{}{}{}{}{}{}'.format(recipe.id, revision.created, revision.name,
+                                     revision.action.id, revision.arguments_json, expression)
+        assert revision.filter_expression == expression
+        assert revision.hash() == hashlib.sha256(data.encode()).hexdigest()
+
 
 @pytest.mark.django_db
 class TestApprovalRequest(object):
@@ -608,7 +757,7 @@ class TestRecipeQueryset(object):
         Recipe.objects.all().update_signatures()
 
         # Assert that the signature update is logged.
-        mock_logger.info.assert_called_with(
+        mock_logger.info.assert_any_call(
             Whatever.contains(str(recipe1.id), str(recipe2.id)),
             extra={
                 'code': INFO_REQUESTING_RECIPE_SIGNATURES,
@@ -622,6 +771,101 @@ class TestRecipeQueryset(object):
         signatures = list(Recipe.objects.all().values_list('signature__signature', flat=True))
         assert signatures == ['fake signature 1', 'fake signature 2']
 
+        # Assert that the throughput is logged
+        mock_logger.info.assert_called_with(
+            Whatever.contains('2 recipes'),
+            extra={
+                'code': INFO_UPDATED_RECIPE_SIGNATURES,
+                'recipe_count': 2,
+                'chunk_count': 1,
+                'duration': Whatever(),
+            }
+        )
+
+    def test_update_signatures_in_chunks(self, settings, fake_autograph):
+        recipes = RecipeFactory.create_batch(5)
+        settings.AUTOGRAPH_SIGNING_CHUNK_SIZE = 2
+        fake_autograph.requests = []
+
+        Recipe.objects.all().update_signatures()
+
+        assert sorted(len(request) for request in fake_autograph.requests) == [1, 2, 2]
+        for recipe in recipes:
+            recipe.refresh_from_db()
+            expected_signature = hashlib.sha256(recipe.canonical_json()).hexdigest()
+            assert recipe.signature.signature == expected_signature
+            assert recipe.signature.public_key == 'fake public key'
+
+    def test_update_signatures_retries_failed_chunks(self, fake_autograph):
+        recipe = RecipeFactory()
+        fake_autograph.requests = []
+        fake_autograph.failures = 2
+
+        Recipe.objects.all().update_signatures()
+
+        assert len(fake_autograph.requests) == 3
+        recipe.refresh_from_db()
+        assert recipe.signature.signature == hashlib.sha256(recipe.canonical_json()).hexdigest()
+
+    @pytest.mark.parametrize('processes', [1, 2])
+    def test_verify_signatures(self, processes):
+        good_recipe = RecipeFactory(signed=True)
+        bad_recipe = RecipeFactory(signed=True)
+        RecipeFactory(signed=False)
+
+        signing_key = ecdsa.SigningKey.generate(curve=ecdsa.NIST384p)
+        signature = signing_key.sign(
+            b'Content-Signature:\x00' + good_recipe.canonical_json(), hashfunc=hashlib.sha384)
+        good_recipe.signature.signature = base64.urlsafe_b64encode(signature).decode()
+        good_recipe.signature.public_key = signing_key.get_verifying_key().to_pem().decode()
+        good_recipe.signature.save()
+
+        assert Recipe.objects.all().verify_signatures(processes=processes) == {
+            'recipe_count': 2,
+            'valid_count': 1,
+            'invalid_count': 1,
+            'invalid_recipes': [{
+                'id': bad_recipe.id,
+                'name': bad_recipe.name,
+                'error': signing.WrongSignatureSize.detail,
+            }],
+            'duration': Whatever(lambda d: d >= 0),
+        }
+
+
+@pytest.mark.django_db
+class TestRecipeListVersion(object):
+    def test_it_is_bumped(self):
+        RecipeListVersion.objects.all().delete()
+        assert RecipeListVersion.get() == 0
+        RecipeListVersion.bump()
+        assert RecipeListVersion.get() == 1
+        RecipeListVersion.bump()
+        assert RecipeListVersion.get() == 2
+
+    def test_it_is_bumped_when_recipes_change(self):
+        recipe = RecipeFactory()
+        version = RecipeListVersion.get()
+        recipe.revise(name='changed')
+        assert RecipeListVersion.get() > version
+
+        version = RecipeListVersion.get()
+        recipe.latest_revision.locales.add(LocaleFactory())
+        assert RecipeListVersion.get() > version
+
+    def test_it_is_bumped_when_users_change(self):
+        user = UserFactory()
+        version = RecipeListVersion.get()
+        user.first_name = 'changed'
+        user.save()
+        assert RecipeListVersion.get() > version
+
+    def test_it_is_not_bumped_by_logins(self):
+        user = UserFactory()
+        version = RecipeListVersion.get()
+        user.save(update_fields=['last_login'])
+        assert RecipeListVersion.get() == version
+
 
 class TestClient(object):
     def test_geolocation(self, rf, settings):
@@ -1,11 +1,15 @@
 import base64
 import os
-from datetime import datetime, timedelta
+import threading
+import time
+from datetime import datetime, timedelta, timezone
 from unittest.mock import MagicMock
 
+from django.core.cache import cache
 from django.core.exceptions import ImproperlyConfigured
 
 import pytest
+import requests
 
 from normandy.base.tests import Whatever
 from normandy.recipes import signing
@@ -121,6 +125,41 @@ class TestAutographer(object):
             ]]
         )
 
+    def test_it_retries_failed_requests(self, settings, mock_logger):
+        settings.AUTOGRAPH_URL = 'https://autograph.example.com/'
+        settings.AUTOGRAPH_HAWK_ID = 'hawk id'
+        settings.AUTOGRAPH_HAWK_SECRET_KEY = 'hawk secret key'
+        settings.AUTOGRAPH_SIGNING_RETRIES = 2
+        settings.AUTOGRAPH_SIGNING_RETRY_BACKOFF = 0
+
+        autographer = signing.Autographer()
+        autographer.session = MagicMock()
+        response = MagicMock()
+        response.json.return_value = [{'signature': 'sig', 'public_key': 'key'}]
+        autographer.session.post.side_effect = [requests.ConnectionError(), response]
+
+        assert autographer.sign_data([b'foo']) == [
+            {'timestamp': Whatever(), 'signature': 'sig', 'x5u': None, 'public_key': 'key'},
+        ]
+        assert autographer.session.post.call_count == 2
+        mock_logger.warning.assert_called_with(
+            Whatever(), extra={'code': signing.WARNING_RETRYING_SIGNING})
+
+    def test_it_gives_up_after_retries(self, settings, mock_logger):
+        settings.AUTOGRAPH_URL = 'https://autograph.example.com/'
+        settings.AUTOGRAPH_HAWK_ID = 'hawk id'
+        settings.AUTOGRAPH_HAWK_SECRET_KEY = 'hawk secret key'
+        settings.AUTOGRAPH_SIGNING_RETRIES = 2
+        settings.AUTOGRAPH_SIGNING_RETRY_BACKOFF = 0
+
+        autographer = signing.Autographer()
+        autographer.session = MagicMock()
+        autographer.session.post.side_effect = requests.ConnectionError()
+
+        with pytest.raises(requests.ConnectionError):
+            autographer.sign_data([b'foo'])
+        assert autographer.session.post.call_count == 3
+
 
 class TestVerifySignature(object):
 
@@ -151,6 +190,42 @@ class TestVerifySignature(object):
         with pytest.raises(signing.SignatureDoesNotMatch):
             signing.verify_signature(self.data, signature, self.pubkey)
 
+    def test_it_caches_public_keys(self):
+        signing.get_verifying_key.cache_clear()
+        signing.verify_signature(self.data, self.signature, self.pubkey)
+        signing.verify_signature(self.data, self.signature, self.pubkey)
+        assert signing.get_verifying_key.cache_info().misses == 1
+        assert signing.get_verifying_key.cache_info().hits == 1
+
+
+class TestVerifySignatures(object):
+    data = TestVerifySignature.data
+    signature = TestVerifySignature.signature
+    pubkey = TestVerifySignature.pubkey
+
+    @pytest.mark.parametrize('processes', [1, 2])
+    def test_it_works(self, processes):
+        items = [
+            (self.data, self.signature, self.pubkey),
+            (self.data, 'aa==', self.pubkey),
+            (self.data, self.signature.replace('s', 'S'), self.pubkey),
+        ]
+        results = signing.verify_signatures(items, processes=processes)
+        assert [type(result) for result in results] == [
+            type(None),
+            signing.WrongSignatureSize,
+            signing.SignatureDoesNotMatch,
+        ]
+
+    def test_empty(self):
+        assert signing.verify_signatures([]) == []
+
+    def test_it_does_not_start_processes_by_default(self, mocker):
+        executor = mocker.patch('normandy.recipes.signing.ProcessPoolExecutor')
+        items = [(self.data, self.signature, self.pubkey)] * 2
+        assert signing.verify_signatures(items) == [None, None]
+        assert not executor.called
+
 
 class TestParsePemToCerts(object):
 
@@ -225,6 +300,12 @@ class TestCheckValidity(object):
 
 class TestVerifyX5u(object):
 
+    @pytest.fixture(autouse=True)
+    def clear_certificate_chains(self):
+        signing.certificate_chains.clear()
+        yield
+        signing.certificate_chains.clear()
+
     def test_it_works(self, mocker):
         mock_requests = mocker.patch('normandy.recipes.signing.requests')
         mock_parse_pem_to_certs = mocker.patch('normandy.recipes.signing.parse_pem_to_certs')
@@ -283,3 +364,115 @@ class TestVerifyX5u(object):
         assert mock_requests.get.called_once_with(url)
         body = mock_requests.get.return_value.content.decode.return_value
         assert mock_parse_pem_to_certs.called_once_with(body)
+
+
+def make_certs(not_before, not_after, count=1):
+    date_format = '%y%m%d%H%M%SZ'
+    return [
+        {
+            'tbsCertificate': {
+                'validity': {
+                    'notBefore': {'utcTime': not_before.strftime(date_format).encode()},
+                    'notAfter': {'utcTime': not_after.strftime(date_format).encode()},
+                }
+            }
+        }
+        for i in range(count)
+    ]
+
+
+class TestCertificateChainCache(object):
+
+    @pytest.fixture
+    def mock_parse_pem_to_certs(self, mocker):
+        now = datetime.utcnow()
+        mock_parse = mocker.patch('normandy.recipes.signing.parse_pem_to_certs')
+        mock_parse.return_value = make_certs(now - timedelta(days=1), now + timedelta(days=1))
+        return mock_parse
+
+    def test_it_works(self, fake_x5u_server):
+        with open(os.path.join(os.path.dirname(__file__), 'data', 'test_certs.pem'), 'rb') as f:
+            fake_x5u_server.content = f.read()
+
+        validities = signing.certificate_chains.get(fake_x5u_server.url)
+        assert len(validities) == 3
+        for not_before, not_after in validities:
+            assert not_before < not_after
+
+    def test_it_fetches_each_url_once(self, fake_x5u_server, mock_parse_pem_to_certs):
+        signing.certificate_chains.get(fake_x5u_server.url)
+        signing.certificate_chains.get(fake_x5u_server.url)
+        signing.certificate_chains.get(fake_x5u_server.url + 'other.pem')
+        assert fake_x5u_server.requests == ['/', '/other.pem']
+
+    def test_concurrent_callers_share_a_fetch(self, fake_x5u_server, mock_parse_pem_to_certs):
+        fake_x5u_server.delay = 0.2
+        threads = [
+            threading.Thread(target=signing.certificate_chains.get, args=[fake_x5u_server.url])
+            for i in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert fake_x5u_server.requests == ['/']
+
+    def test_it_shares_chains_via_the_django_cache(
+        self, fake_x5u_server, mock_parse_pem_to_certs
+    ):
+        validities = signing.certificate_chains.get(fake_x5u_server.url)
+        other_process_cache = signing.CertificateChainCache()
+        assert other_process_cache.get(fake_x5u_server.url) == validities
+        assert fake_x5u_server.requests == ['/']
+
+    def test_it_expires_after_the_cache_time(
+        self, fake_x5u_server, mock_parse_pem_to_certs, settings
+    ):
+        settings.CERTIFICATES_CACHE_TIME = 60
+        signing.certificate_chains.get(fake_x5u_server.url)
+        expires, _ = cache.get(signing.certificate_chains.cache_key(fake_x5u_server.url))
+        assert expires == pytest.approx(time.time() + 60, abs=5)
+
+    def test_it_expires_with_the_first_certificate(
+        self, fake_x5u_server, mock_parse_pem_to_certs, settings
+    ):
+        settings.CERTIFICATES_CACHE_TIME = 60 * 60 * 24 * 7
+        now = datetime.utcnow().replace(microsecond=0)
+        not_after = now + timedelta(hours=1)
+        mock_parse_pem_to_certs.return_value = (
+            make_certs(now - timedelta(days=1), now + timedelta(days=2)) +
+            make_certs(now - timedelta(days=1), not_after)
+        )
+
+        signing.certificate_chains.get(fake_x5u_server.url)
+        expires, _ = cache.get(signing.certificate_chains.cache_key(fake_x5u_server.url))
+        assert expires == not_after.replace(tzinfo=timezone.utc).timestamp()
+
+    def test_expired_chains_are_not_cached(self, fake_x5u_server, mock_parse_pem_to_certs):
+        now = datetime.utcnow()
+        mock_parse_pem_to_certs.return_value = make_certs(
+            now - timedelta(days=2), now - timedelta(days=1))
+
+        signing.certificate_chains.get(fake_x5u_server.url)
+        signing.certificate_chains.get(fake_x5u_server.url)
+        assert fake_x5u_server.requests == ['/', '/']
+
+    def test_clear_forgets_chains_from_other_processes(
+        self, fake_x5u_server, mock_parse_pem_to_certs
+    ):
+        other_process_cache = signing.CertificateChainCache()
+        other_process_cache.get(fake_x5u_server.url)
+
+        signing.certificate_chains.clear()
+        signing.certificate_chains.get(fake_x5u_server.url)
+        assert fake_x5u_server.requests == ['/', '/']
+
+    def test_it_forgets_expired_chains(self, fake_x5u_server, mock_parse_pem_to_certs, mocker):
+        mock_time = mocker.patch('normandy.recipes.signing.time')
+        mock_time.time.return_value = time.time()
+        chains = signing.CertificateChainCache()
+        chains.get(fake_x5u_server.url)
+
+        mock_time.time.return_value += 60 * 60 * 24 * 2
+        chains.get(fake_x5u_server.url + 'other.pem')
+        assert list(chains._chains) == [fake_x5u_server.url + 'other.pem']
@@ -1,5 +1,10 @@
+import json
+
 import pytest
 
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
 from normandy.base.tests import Whatever
 from normandy.recipes.models import Locale
 from normandy.recipes.storage import ProductDetailsRelationalStorage, INFO_UPDATE_PRODUCT_DETAILS
@@ -38,3 +43,39 @@ class TestProductDetailsRelationalStorage(object):
         )
         assert Locale.objects.count() == 12
         assert Locale.objects.filter(code='en-US', name='English (US)').exists()
+
+    def test_update_locales_syncs_changes(self, tmpdir, mock_logger):
+        Locale.objects.create(code='en-US', name='English (American)')
+        Locale.objects.create(code='en-AU', name='English (Australian)')
+        Locale.objects.create(code='tlh', name='Klingon')
+
+        storage = ProductDetailsRelationalStorage(json_dir=tmpdir.strpath)
+        storage.update('languages.json', LANGUAGES_JSON, '1999-01-01')
+
+        languages = json.loads(LANGUAGES_JSON)
+        assert dict(Locale.objects.values_list('code', 'name')) == {
+            code: names['English'] for code, names in languages.items()
+        }
+
+    def test_sync_locales_query_count(self, tmpdir):
+        storage = ProductDetailsRelationalStorage(json_dir=tmpdir.strpath)
+        languages = json.loads(LANGUAGES_JSON)
+        locale_names = {code: names['English'] for code, names in languages.items()}
+
+        # Every new locale is inserted at once.
+        with CaptureQueriesContext(connection) as captured:
+            storage.sync_locales(locale_names)
+        assert len(captured) == 2
+        assert Locale.objects.count() == 12
+
+        # Locales that haven't changed aren't written to.
+        with CaptureQueriesContext(connection) as captured:
+            storage.sync_locales(locale_names)
+        assert len(captured) == 1
+
+        # Every renamed locale is updated at once.
+        renamed = {code: name + ' (renamed)' for code, name in locale_names.items()}
+        with CaptureQueriesContext(connection) as captured:
+            storage.sync_locales(renamed)
+        assert len(captured) == 2
+        assert dict(Locale.objects.values_list('code', 'name')) == renamed
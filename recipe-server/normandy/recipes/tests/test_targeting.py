@@ -0,0 +1,94 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from normandy.base.tests import UserFactory
+from normandy.recipes import targeting
+from normandy.recipes.tests import CountryFactory, RecipeFactory
+from normandy.recipes.validators import FILTER_EXPRESSION_TRANSFORMS
+
+
+def evaluate(expression, context=None):
+    return targeting.evaluate(targeting.get_jexl().parse(expression), context or {})
+
+
+class TestTransforms(object):
+    def test_all_client_transforms_are_implemented(self):
+        assert set(targeting.TRANSFORMS) == set(FILTER_EXPRESSION_TRANSFORMS)
+
+    def test_date(self):
+        assert targeting.date('2017-01-02T03:04:05Z') == datetime(
+            2017, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+        assert targeting.date('2017-01-02') == datetime(2017, 1, 2, tzinfo=timezone.utc)
+        assert targeting.date('not a date') is None
+
+    def test_stable_sample(self):
+        matches = [evaluate(f'["user-{i}", 1]|stableSample(0.3)') for i in range(1000)]
+        assert 200 < matches.count(True) < 400
+        assert matches == [evaluate(f'["user-{i}", 1]|stableSample(0.3)') for i in range(1000)]
+
+    def test_bucket_sample(self):
+        matches = [evaluate(f'"user-{i}"|bucketSample(10, 25, 100)') for i in range(1000)]
+        assert 150 < matches.count(True) < 350
+
+    def test_preferences_are_unset(self):
+        assert evaluate('"some.pref"|preferenceValue("default") == "default"')
+        assert not evaluate('"some.pref"|preferenceExists')
+        assert not evaluate('"some.pref"|preferenceIsUserSet')
+
+
+class TestEvaluate(object):
+    def test_it_works(self):
+        assert evaluate('normandy.country == "US"', {'normandy': {'country': 'US'}})
+        assert not evaluate('normandy.country == "US"', {'normandy': {'country': 'CA'}})
+
+    def test_errors_do_not_match(self):
+        assert not evaluate('normandy.request_time > "2017-01-01"|date', {'normandy': {}})
+
+
+@pytest.mark.django_db
+class TestEstimateReach(object):
+    def test_it_works(self):
+        us = CountryFactory(code='US')
+        CountryFactory(code='CA')
+        recipe = RecipeFactory(countries=[us], extra_filter_expression='true')
+        everyone = RecipeFactory(extra_filter_expression='true')
+
+        contexts = targeting.generate_client_contexts(200, seed=1)
+        report = targeting.estimate_reach([recipe, everyone], contexts)
+
+        us_count = sum(c['normandy']['country'] == 'US' for c in contexts)
+        assert report['context_count'] == 200
+        assert report['recipes'][0]['id'] == recipe.id
+        assert report['recipes'][0]['match_count'] == us_count
+        assert report['recipes'][0]['estimate'] == us_count / 200
+        assert report['recipes'][1]['match_count'] == 200
+
+    def test_recipes_are_available_to_expressions(self):
+        recipe = RecipeFactory(
+            extra_filter_expression='[normandy.userId, normandy.recipe.id]|stableSample(0.5)')
+        contexts = targeting.generate_client_contexts(200, seed=1)
+        report = targeting.estimate_reach([recipe], contexts)
+        assert 50 < report['recipes'][0]['match_count'] < 150
+
+    def test_unparseable_expressions_are_reported(self):
+        recipe = RecipeFactory(extra_filter_expression='inv(-alsid')
+        report = targeting.estimate_reach([recipe], targeting.generate_client_contexts(10))
+        assert report['recipes'][0]['match_count'] is None
+        assert report['recipes'][0]['error'] == 'Could not parse expression: inv(-alsid'
+
+    def test_parsed_expressions_are_cached_per_revision(self):
+        recipe = RecipeFactory(approver=UserFactory(), enabled=True)
+        targeting.parse_revision_expression.cache_clear()
+        contexts = targeting.generate_client_contexts(10)
+        targeting.estimate_reach([recipe], contexts)
+        targeting.estimate_reach([recipe], contexts)
+        assert targeting.parse_revision_expression.cache_info().misses == 1
+        assert targeting.parse_revision_expression.cache_info().hits == 1
+
+    def test_generated_contexts_are_repeatable(self):
+        CountryFactory(code='US')
+        contexts1 = targeting.generate_client_contexts(10, seed=1)
+        contexts2 = targeting.generate_client_contexts(10, seed=1)
+        assert [c['normandy']['userId'] for c in contexts1] == [
+            c['normandy']['userId'] for c in contexts2]
@@ -3,7 +3,12 @@ from fractions import Fraction
 
 import pytest
 
-from normandy.recipes.utils import fraction_to_key
+from normandy.recipes.utils import (
+    deterministic_bucket_sample,
+    deterministic_sample,
+    deterministic_sample_many,
+    fraction_to_key,
+)
 
 
 @pytest.fixture
@@ -42,3 +47,41 @@ class TestFractionToKey(object):
             r = random()
             key = fraction_to_key(r)
             assert len(key) == 64
+
+
+class TestDeterministicSampleMany(object):
+    inputs_list = [[f'user-{i}', i % 7] for i in range(1000)] + [[], [''], ['a', 'b', 'c']]
+
+    @pytest.mark.parametrize('rate', [0, 0.00001, 0.25, Fraction(1, 3), 0.5, 0.999, 1])
+    def test_matches_scalar_version(self, rate):
+        expected = [deterministic_sample(rate, inputs) for inputs in self.inputs_list]
+        assert deterministic_sample_many(rate, self.inputs_list) == expected
+
+    def test_random_rates(self):
+        for _ in range(20):
+            rate = random()
+            expected = [deterministic_sample(rate, inputs) for inputs in self.inputs_list]
+            assert deterministic_sample_many(rate, self.inputs_list) == expected
+
+    def test_accepts_iterables(self):
+        assert deterministic_sample_many(1, (['a'] for i in range(3))) == [True] * 3
+
+
+class TestDeterministicBucketSample(object):
+    def test_buckets_partition_inputs(self):
+        for i in range(100):
+            matches = [deterministic_bucket_sample(b, 1, 10, [i]) for b in range(10)]
+            assert matches.count(True) == 1
+
+    def test_it_wraps_around(self):
+        for i in range(100):
+            wrapped = deterministic_bucket_sample(8, 4, 10, [i])
+            expected = (
+                deterministic_bucket_sample(8, 2, 10, [i])
+                or deterministic_bucket_sample(0, 2, 10, [i])
+            )
+            assert wrapped == expected
+
+    def test_all_buckets(self):
+        assert all(deterministic_bucket_sample(0, 10, 10, [i]) for i in range(100))
+        assert not any(deterministic_bucket_sample(3, 0, 10, [i]) for i in range(100))
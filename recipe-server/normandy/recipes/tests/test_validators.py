@@ -2,7 +2,12 @@ from django.core.exceptions import ValidationError
 
 import pytest
 
-from normandy.recipes.validators import validate_json
+from normandy.recipes.validators import (
+    FILTER_EXPRESSION_TRANSFORMS,
+    get_arguments_validator,
+    get_filter_expression_errors,
+    validate_json,
+)
 
 
 def test_validate_json():
@@ -10,3 +15,38 @@ def test_validate_json():
     validate_json('{"foo": 2, "bar": "bazz"}')
     with pytest.raises(ValidationError):
         validate_json('invalid_json"""""sadf')
+
+
+class TestGetArgumentsValidator(object):
+    schema_json = '{"type": "object", "required": ["message"]}'
+
+    def test_it_works(self):
+        validator = get_arguments_validator(self.schema_json)
+        assert validator.is_valid({'message': 'hi'})
+        assert not validator.is_valid({'message': ''})
+
+    def test_it_caches_validators_by_schema(self):
+        validator = get_arguments_validator(self.schema_json)
+        assert get_arguments_validator(self.schema_json) is validator
+        assert get_arguments_validator('{"type": "object"}') is not validator
+
+
+class TestGetFilterExpressionErrors(object):
+    def test_valid_expression(self):
+        assert get_filter_expression_errors('normandy.channel == "beta"') == ()
+
+    def test_invalid_expression(self):
+        assert get_filter_expression_errors('inv(-alsid') == (
+            'Could not parse expression: inv(-alsid',
+        )
+
+    def test_it_allows_client_transforms(self):
+        for transform in FILTER_EXPRESSION_TRANSFORMS:
+            assert get_filter_expression_errors(f'"foo"|{transform}') == ()
+        assert get_filter_expression_errors('"foo"|notATransform') != ()
+
+    def test_it_caches_results(self):
+        get_filter_expression_errors.cache_clear()
+        get_filter_expression_errors('1 + 1 == 2')
+        get_filter_expression_errors('1 + 1 == 2')
+        assert get_filter_expression_errors.cache_info().hits == 1
@@ -12,7 +12,7 @@ v1_router.register('recipe', api_v1_views.RecipeViewSet)
 v1_router.register('recipe_revision', api_v1_views.RecipeRevisionViewSet)
 v1_router.register(r'approval_request', api_v1_views.ApprovalRequestViewSet)
 
-v1_router.register_view('classify_client', api_v1_views.ClassifyClient, name='classify-client',
+v1_router.register_view('classify_client', api_v1_views.classify_client, name='classify-client',
                         allow_cdn=False)
 v1_router.register_view('filters', api_v1_views.Filters, name='filters')
 
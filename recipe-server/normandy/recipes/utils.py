@@ -24,6 +24,14 @@ def fraction_to_key(frac):
         return padded
 
 
+def hash_inputs(inputs):
+    """Return the hex SHA-256 digest of a list of inputs, as used for sampling."""
+    hasher = hashlib.sha256()
+    for inp in inputs:
+        hasher.update(str(inp).encode('utf8'))
+    return hasher.hexdigest()
+
+
 def deterministic_sample(rate, inputs):
     """
     Deterministically choose True or False based for a set of inputs.
@@ -35,14 +43,65 @@ def deterministic_sample(rate, inputs):
     :param input: A list of hashable data to feed to decide True or False about
     :returns: True with probability `rate` and False otherwise
     """
-    hasher = hashlib.sha256()
-    for inp in inputs:
-        hasher.update(str(inp).encode('utf8'))
-
     sample_point = fraction_to_key(rate)
-    input_hash = hasher.hexdigest()
+    input_hash = hash_inputs(inputs)
 
     assert len(sample_point) == 64
     assert len(input_hash) == 64
 
     return input_hash < sample_point
+
+
+def deterministic_sample_many(rate, inputs_list):
+    """
+    Deterministically choose True or False for many sets of inputs at once,
+    with the same results as calling `deterministic_sample` for each.
+
+    The sample point is converted once to a 256-bit big-endian unsigned
+    integer, and each raw digest is compared with it directly, which avoids
+    formatting every hash as a hex string.
+
+    :param rate: The probability of returning True
+    :param inputs_list: An iterable of lists of hashable data to decide True
+        or False about
+    :returns: A list of booleans, one for each list of inputs
+    """
+    threshold = int(fraction_to_key(rate), 16).to_bytes(32, 'big')
+    sha256 = hashlib.sha256
+
+    # Hashing the concatenated inputs gives the same digest as hashing them
+    # one at a time, as `hash_inputs` does.
+    return [
+        sha256(''.join(map(str, inputs)).encode('utf8')).digest() < threshold
+        for inputs in inputs_list
+    ]
+
+
+def deterministic_bucket_sample(start, count, total, inputs):
+    """
+    Deterministically choose whether a set of inputs falls in a range of
+    buckets.
+
+    The hash space is split into `total` buckets, and True is returned if
+    the hash of `inputs` is in one of the `count` buckets starting at
+    `start`. The range wraps around, so with 100 buckets, 50 buckets from
+    bucket 70 covers buckets 70-99 and 0-19.
+
+    :param start: The index of the first bucket in the range
+    :param count: The number of buckets in the range
+    :param total: The total number of buckets
+    :param inputs: A list of hashable data to decide True or False about
+    :returns: True if the inputs are in the range of buckets
+    """
+    input_hash = hash_inputs(inputs)
+
+    def in_buckets(min_bucket, max_bucket):
+        min_point = fraction_to_key(min_bucket / total)
+        max_point = fraction_to_key(max_bucket / total)
+        return min_point <= input_hash < max_point
+
+    start = start % total
+    end = start + count
+    if end > total:
+        return in_buckets(0, end % total) or in_buckets(start, total)
+    return in_buckets(start, end)
@@ -1,5 +1,8 @@
 import json
+from functools import lru_cache
+
 import jsonschema
+from pyjexl import JEXL
 
 from django.core.exceptions import ValidationError
 
@@ -28,6 +31,49 @@ JSONSchemaValidator = jsonschema.validators.extend(
 )
 
 
+@lru_cache(maxsize=32)
+def get_arguments_validator(schema_json):
+    """
+    Return a validator for the JSON schema in `schema_json`.
+
+    Validators are cached by the text of their schema, so an action whose
+    schema changes gets a new validator, and unchanged schemas are only
+    parsed once per process.
+    """
+    return JSONSchemaValidator(json.loads(schema_json))
+
+
+#: Transforms that clients make available to filter expressions. See
+#: http://normandy.readthedocs.io/en/latest/user/filter_expressions.html#transforms
+FILTER_EXPRESSION_TRANSFORMS = [
+    'date',
+    'stableSample',
+    'bucketSample',
+    'preferenceValue',
+    'preferenceIsUserSet',
+    'preferenceExists',
+]
+
+
+@lru_cache(maxsize=None)
+def get_filter_expression_jexl():
+    """Return a shared JEXL instance with mock transforms for validation."""
+    jexl = JEXL()
+    for name in FILTER_EXPRESSION_TRANSFORMS:
+        jexl.add_transform(name, lambda x: x)
+    return jexl
+
+
+@lru_cache(maxsize=1024)
+def get_filter_expression_errors(expression):
+    """
+    Return a tuple of the errors in a filter expression, which is empty if
+    the expression is valid. Results are cached by expression, since
+    recipes are often saved without changing their filter expression.
+    """
+    return tuple(get_filter_expression_jexl().validate(expression))
+
+
 def validate_json(value):
     """
     Validate that a given value can be successfully parsed as JSON.
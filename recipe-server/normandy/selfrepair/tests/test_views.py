@@ -30,3 +30,9 @@ class TestSelfRepair(object):
         res = client.get(self.url)
         assert res.status_code == 200
         assert res.client.cookies == {}
+
+    def test_has_security_headers(self, client):
+        res = client.get(self.url)
+        assert res.status_code == 200
+        assert 'Content-Security-Policy' in res
+        assert 'X-Frame-Options' in res
@@ -38,6 +38,9 @@ class Core(Configuration):
     # details.
     MIDDLEWARE = [
         'normandy.base.middleware.request_received_at_middleware',
+        # Views marked with short_circuit_middlewares skip everything after
+        # this, and only use SHORT_CIRCUIT_MIDDLEWARE.
+        'normandy.base.middleware.ShortCircuitMiddleware',
         'normandy.base.middleware.RequestSummaryLogger',
         'django.middleware.security.SecurityMiddleware',
         'normandy.base.middleware.NormandyWhiteNoiseMiddleware',
@@ -46,6 +49,14 @@ class Core(Configuration):
         'csp.middleware.CSPMiddleware',
     ]
 
+    # Middleware used for views marked with short_circuit_middlewares
+    SHORT_CIRCUIT_MIDDLEWARE = [
+        'normandy.base.middleware.RequestSummaryLogger',
+        'django.middleware.security.SecurityMiddleware',
+        'django.middleware.clickjacking.XFrameOptionsMiddleware',
+        'csp.middleware.CSPMiddleware',
+    ]
+
     ROOT_URLCONF = 'normandy.urls'
 
     TEMPLATES = [
@@ -235,6 +246,9 @@ class Base(Core):
     DATABASES = values.DatabaseURLValue('postgres://postgres@localhost/normandy')
     CONN_MAX_AGE = values.IntegerValue(0)
     GEOIP2_DATABASE = values.Value(os.path.join(Core.BASE_DIR, 'GeoLite2-Country.mmdb'))
+    GEOIP2_CACHE_SIZE = values.IntegerValue(10000)
+    GEOIP2_CACHE_TTL = values.IntegerValue(60 * 60)
+    GEOIP2_RELOAD_INTERVAL = values.IntegerValue(60)
     # Email settings
     EMAIL_HOST_USER = values.Value()
     EMAIL_HOST = values.Value()
@@ -311,9 +325,12 @@ class Base(Core):
     # Normandy settings
     ADMIN_ENABLED = values.BooleanValue(True)
     ACTION_IMPLEMENTATION_CACHE_TIME = values.IntegerValue(60 * 60 * 24 * 365)
+    ACTION_IMPLEMENTATION_CACHE_MAX_ENTRIES = values.IntegerValue(32)
     NUM_PROXIES = values.IntegerValue(0)
     API_CACHE_TIME = values.IntegerValue(30)
     API_CACHE_ENABLED = values.BooleanValue(True)
+    API_SNAPSHOT_CACHE_TIME = values.IntegerValue(60 * 60)
+    API_SNAPSHOT_MAX_ENTRIES = values.IntegerValue(16)
 
     # If true, approvals must come from two separate users. If false, the same
     # user can approve their own request.
@@ -325,9 +342,27 @@ class Base(Core):
     AUTOGRAPH_HAWK_SECRET_KEY = values.Value()
     AUTOGRAPH_SIGNATURE_MAX_AGE = values.IntegerValue(60 * 60 * 24 * 7)
     AUTOGRAPH_X5U_CACHE_BUST = values.Value(None)
+    AUTOGRAPH_SIGNING_CHUNK_SIZE = values.IntegerValue(100)
+    AUTOGRAPH_SIGNING_CONCURRENCY = values.IntegerValue(4)
+    AUTOGRAPH_SIGNING_RETRIES = values.IntegerValue(3)
+    AUTOGRAPH_SIGNING_RETRY_BACKOFF = values.FloatValue(1.0)
+    SIGNATURE_VERIFICATION_PROCESSES = values.IntegerValue(None)
+
+    # The number of synthetic clients to evaluate recipes against when estimating reach
+    TARGETING_ESTIMATE_SAMPLE_SIZE = values.IntegerValue(1000)
+
+    # Heartbeat settings
+    HEARTBEAT_CHECK_TTL = values.IntegerValue(60)
+    HEARTBEAT_CHECK_TTLS = values.DictValue({})
+    HEARTBEAT_REFRESH_IN_BACKGROUND = values.BooleanValue(True)
+    HEARTBEAT_REFRESH_INTERVAL = values.IntegerValue(5)
+    HEARTBEAT_CHECK_MAX_AGE = values.IntegerValue(300)
 
     # How many days before expiration to warn for expired certificates
     CERTIFICATES_EXPIRE_EARLY_DAYS = values.IntegerValue(None)
+    # How long to reuse a fetched certificate chain, at most
+    CERTIFICATES_CACHE_TIME = values.IntegerValue(60 * 60)
+    CERTIFICATES_FETCH_TIMEOUT = values.FloatValue(10.0)
 
     PROD_DETAILS_DIR = values.Value(os.path.join(Core.BASE_DIR, 'product_details'))
 
@@ -422,3 +457,5 @@ class Test(Base):
     AUTOGRAPH_URL = None
     AUTOGRAPH_HAWK_ID = None
     AUTOGRAPH_HAWK_SECRET_KEY = None
+    HEARTBEAT_CHECK_TTL = 0
+    HEARTBEAT_REFRESH_IN_BACKGROUND = False